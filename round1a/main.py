@@ -1,30 +1,60 @@
 #!/usr/bin/env python3
-import json, sys, time
+import hashlib, io, os, sys, time
+import orjson
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from src.extractor import extract_outline
+from src import extractor
+from src.extractor import extract_outline, PAGE_WORKERS
 
 INPUT_DIR  = Path("/app/input")
 OUTPUT_DIR = Path("/app/output")
+CACHE_DIR  = Path("/app/cache")
+# Cache keys are salted with the extractor source, so changing it invalidates
+# earlier outlines; bump CACHE_FORMAT when the cached JSON changes
+CACHE_FORMAT = 1
+CACHE_SALT = hashlib.sha256(f"{CACHE_FORMAT}\0".encode() + Path(extractor.__file__).read_bytes()).hexdigest()[:16]
+# Outputs are compact JSON unless PRETTY_JSON is set (handy when debugging)
+PRETTY_JSON = bool(os.getenv("PRETTY_JSON"))
 
-def process_pdf(pdf_path: Path):
+def process_pdf(pdf_path: Path, page_workers: int = 1):
     start = time.perf_counter()
-    data = extract_outline(str(pdf_path))
+    pdf_bytes = pdf_path.read_bytes()
+    # Outlines only depend on the PDF bytes and the extractor, so reuse results from earlier runs
+    cache_path = CACHE_DIR / f"{hashlib.sha256(pdf_bytes).hexdigest()}-{CACHE_SALT}.outline.json"
+    if cache_path.exists():
+        data = orjson.loads(cache_path.read_bytes())
+    else:
+        data = extract_outline(io.BytesIO(pdf_bytes), page_workers)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(orjson.dumps(data))
+        os.replace(tmp_path, cache_path)
     runtime = time.perf_counter() - start
     json_path = OUTPUT_DIR / f"{pdf_path.stem}.json"
-    json_path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+    json_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 if PRETTY_JSON else 0))
     print(f"[✓] {pdf_path.name}  ({runtime:.2f}s)  →  {json_path.name}")
 
 def main():
     OUTPUT_DIR.mkdir(exist_ok=True)
-    pdfs = list(INPUT_DIR.glob("*.pdf"))
+    CACHE_DIR.mkdir(exist_ok=True)
+    try:
+        with os.scandir(INPUT_DIR) as entries:
+            pdfs = [Path(e.path) for e in entries if e.is_file() and e.name.lower().endswith(".pdf")]
+    except FileNotFoundError:
+        pdfs = []
     if not pdfs:
         print("No PDFs found in /app/input", file=sys.stderr)
         sys.exit(1)
-    for pdf in pdfs:
-        try:
-            process_pdf(pdf)
-        except Exception as e:
-            print(f"[✗] {pdf.name}: {e}", file=sys.stderr)
+    # Each PDF is parsed independently, so spread them across all cores; the
+    # pages of a document are only split across processes when it is the only one
+    doc_workers = min(os.cpu_count() or 1, len(pdfs))
+    page_workers = PAGE_WORKERS if doc_workers == 1 else 1
+    with ProcessPoolExecutor(max_workers=doc_workers) as ex:
+        futs = {ex.submit(process_pdf, pdf, page_workers): pdf for pdf in pdfs}
+        for fut in as_completed(futs):
+            try:
+                fut.result()
+            except Exception as e:
+                print(f"[✗] {futs[fut].name}: {e}", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
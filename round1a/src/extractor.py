@@ -1,9 +1,10 @@
-import pdfplumber, pytesseract, math, re
-from PIL import Image
-from langdetect import detect
+import pdfplumber, pytesseract, ahocorasick, re, io, os, tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from pydantic import BaseModel
-from pathlib import Path
-from collections import Counter
+from collections import deque, namedtuple
+from dataclasses import dataclass
+from itertools import groupby
 
 class OutlineItem(BaseModel):
     level: str
@@ -14,37 +15,269 @@ class DocumentOutline(BaseModel):
     title: str
     outline: list[OutlineItem]
 
+@dataclass(slots=True)
+class _Candidate:
+    """Heading candidate passed between extraction and hierarchy building"""
+    text: str
+    text_lower: str
+    level: str
+    page: int
+    confidence: float
+    font_size: float = 0.0
+    position: int = 0
+    source: str = 'text'
+
+# ------------------------------------------------------------------
+# Precompiled patterns for the heading heuristics
+# ------------------------------------------------------------------
+_RE_LEADING_DIGITS = re.compile(r'^\d+')
+_RE_DATE = re.compile(r'^\w+\s+\d{1,2},?\s+\d{4}')
+_RE_TIMELINE_FRAGMENT = re.compile(r'^\w+ \d{4}\s*-?\s*$')
+_RE_TIMELINE_YEAR = re.compile(r'^\d{4}[\s\-]')
+_RE_NUMBERED_MAIN = re.compile(r'^\d+\.\s+[A-Z][a-z]')
+_RE_NUMBERED_SUB = re.compile(r'^\d+\.\d+\s+[A-Z][a-z]')
+_RE_NUMBERED_MAIN_ANY = re.compile(r'^\d+\.\s+[A-Za-z]')
+_RE_NUMBERED_SUB_ANY = re.compile(r'^\d+\.\d+\s+[A-Za-z]')
+_RE_APPENDIX = re.compile(r'^appendix [a-z]:', re.IGNORECASE)
+_RE_PHASE = re.compile(r'^phase [ivx]+:', re.IGNORECASE)
+_RE_PAGE_NUMBER = re.compile(r'^page \d+')
+
+_WELL_FORMED_SECTION_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'^(Summary|Background|Introduction|Overview|Conclusion)$',
+    r'^Appendix [A-Z]:',
+    r'^Phase [IVX]+:',
+    r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*:$',  # Title case ending with colon
+    r'^\d+\.\s+[A-Z][a-z]+'  # Numbered sections
+])
+
+# Every regex accept rule of _is_meaningful_heading as one alternation, so a
+# candidate costs a single match attempt
+_RE_MEANINGFUL_HEADING = re.compile(
+    r'^(?:'
+    r'\d+\.\s+[A-Za-z]'  # Numbered sections
+    r'|\d+\.\d+\s+[A-Za-z]'  # Numbered subsections
+    r'|Appendix [A-Z]:'
+    r'|Phase [IVX]+:'
+    r'|(?:Summary|Background|Introduction|Overview|Conclusion|Timeline|Milestones|Acknowledgements|References)$'
+    r'|[A-Z][a-z]+(?:\s+[A-Z][a-z]*)*:$'
+    r'|(?:Chair|Term|Meetings|Membership|Preamble|Content|Audience|Duration|Outcomes|Trademarks)$'
+    r')',
+    re.IGNORECASE
+)
+
+_IMPORTANT_SINGLE_WORDS = frozenset([
+    'summary', 'background', 'timeline', 'milestones', 'preamble',
+    'membership', 'chair', 'term', 'meetings', 'acknowledgements',
+    'references', 'content', 'trademarks'
+])
+
+# Character-class tests done with str.translate: each table deletes the
+# allowed ASCII symbols, digits and blanks, see _consists_of
+_FINANCIAL_CHARS = str.maketrans('', '', '0123456789$,.%-() \t')
+_NUMERIC_DATA_CHARS = str.maketrans('', '', '0123456789$,.%- \t')
+_NUMBERS_AND_SYMBOLS_CHARS = str.maketrans('', '', '0123456789-.() \t')
+
+def _consists_of(text, table):
+    """True if text is non-empty and only has table chars, digits and whitespace"""
+    # Whatever the table leaves can still be non-ASCII digits or whitespace,
+    # which the regex classes \d and \s also accepted
+    rest = ''.join(text.translate(table).split())
+    return bool(text) and (not rest or rest.isdecimal())
+
+# Literal prefix/suffix sets, checked with a single str.startswith/endswith call
+_FRAGMENT_STARTS = ('and ', 'or ', 'but ', 'the ', 'a ', 'an ', 'of ', 'in ', 'to ', 'for ')
+_FRAGMENT_ENDS = (' and', ' or', ' of', ' in', ' to', ' for', ' the', ' a')
+_INCOMPLETE_STARTS = ('to ', 'and ', 'or ', 'of ', 'in ', 'for ')
+_INCOMPLETE_ENDS = (' to', ' and', ' or', ' of', ' in', ' for', ' the', ' a', ' an')
+_SENTENCE_FRAGMENT_ENDS = _INCOMPLETE_ENDS + (' that', ' which')
+_QUESTION_STARTS = ('What ', 'How ', 'Why ', 'When ', 'Where ')
+_URL_PREFIXES = ('http://', 'https://', 'www.')
+
+# ------------------------------------------------------------------
+# Keyword prefilter: one Aho-Corasick scan reports every keyword class
+# a line contains, instead of one substring loop per keyword list
+# ------------------------------------------------------------------
+_KW_DOCUMENT_STRUCTURE = 1 << 0
+_KW_CAREER_LEARNING = 1 << 1
+_KW_BUSINESS_PATTERNS = 1 << 2
+_KW_SUBHEADING_TERMS = 1 << 3
+_KW_DOCUMENT_HEADERS = 1 << 4
+_KW_TECHNICAL_TERMS = 1 << 5
+_KW_FRAGMENT_INDICATORS = 1 << 6
+_KW_BUSINESS_TERMS = 1 << 7
+_KW_HEADING_INDICATORS = 1 << 8
+
+_KEYWORD_CLASSES = {
+    _KW_DOCUMENT_STRUCTURE: [
+        'revision history', 'table of contents', 'acknowledgements', 
+        'references', 'introduction to the foundation',
+        'overview of the foundation'
+    ],
+    _KW_CAREER_LEARNING: ['intended audience', 'career paths', 'learning objectives', 'entry requirements', 'structure and course', 'keeping it current', 'business outcomes', 'content', 'trademarks', 'documents and web'],
+    _KW_BUSINESS_PATTERNS: [
+        'business plan', 'approach and specific', 'evaluation and awarding', 
+        'milestones', 'requirements', 'terms of reference'
+    ],
+    _KW_SUBHEADING_TERMS: ['funding', 'governance', 'decision-making', 'access', 'support', 'training'],
+    _KW_DOCUMENT_HEADERS: [
+        'revision history', 'table of contents', 'acknowledgements',
+        'references', 'trademarks', 'documents and web sites'
+    ],
+    _KW_TECHNICAL_TERMS: ['intended audience', 'career paths', 'learning objectives'],
+    _KW_FRAGMENT_INDICATORS: [
+        ' is to ', ' are to ', ' will be ', ' has been ', ' have been ',
+        ' can be ', ' should be ', ' must be ', ' to be ', ' that ',
+        ' which ', ' where ', ' when ', ' while ', ' during '
+    ],
+    _KW_BUSINESS_TERMS: [
+        'business plan', 'requirements', 'evaluation', 'approach', 
+        'implementation', 'methodology', 'milestones', 'funding',
+        'terms of reference', 'accountability', 'communication',
+        'intended audience', 'career paths', 'learning objectives',
+        'entry requirements', 'structure and course', 'keeping it current',
+        'business outcomes', 'documents and web sites'
+    ],
+    _KW_HEADING_INDICATORS: ['summary', 'background', 'appendix', 'phase', 'section'],
+}
+
+def _build_keyword_automaton():
+    automaton = ahocorasick.Automaton()
+    for keyword_class, keywords in _KEYWORD_CLASSES.items():
+        for keyword in keywords:
+            # A keyword shared by several lists carries all of their bits
+            automaton.add_word(keyword, automaton.get(keyword, 0) | keyword_class)
+    automaton.make_automaton()
+    return automaton
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+def _keyword_hits(text_lower):
+    """Bitmask of the keyword classes with at least one match in text_lower"""
+    hits = 0
+    for _, keyword_classes in _KEYWORD_AUTOMATON.iter(text_lower):
+        hits |= keyword_classes
+    return hits
+
 # ------------------------------------------------------------------
 # Public API - Pure Heuristic Approach
 # ------------------------------------------------------------------
-def extract_outline(pdf_path: str) -> dict:
-    return _enhanced_heuristic_outline(pdf_path).model_dump()
+def extract_outline(pdf_path: str, page_workers: int = 1) -> dict:
+    """Extract the title and heading outline of a PDF
+    
+    page_workers > 1 spreads the pages of long documents over that many
+    worker processes; callers that already run documents in parallel should
+    leave it at 1.
+    """
+    return _enhanced_heuristic_outline(pdf_path, page_workers).model_dump()
+
+# Suggested page_workers for a single document: a quarter of the cores, leaving
+# room for Tesseract's own threads. Page workers are only used for documents
+# long enough to amortize their startup
+PAGE_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+PARALLEL_MIN_PAGES = 8
+# Consecutive scanned pages sent to Tesseract together
+OCR_BATCH_PAGES = 8
 
-def _enhanced_heuristic_outline(pdf_path: str) -> DocumentOutline:
+def _enhanced_heuristic_outline(pdf_path: str, page_workers: int = 1) -> DocumentOutline:
     """Enhanced heuristic approach with tree-structured heading organization"""
     
     with pdfplumber.open(pdf_path) as pdf:
         # Extract document title from first page
         title = _extract_document_title_from_first_page(pdf.pages[0] if pdf.pages else None)
         
-        # Extract all potential headings from all pages
-        all_candidates = []
-        for page_num, page in enumerate(pdf.pages, start=1):
-            if not page.chars:
-                # OCR for scanned pages
-                ocr_candidates = _ocr_page(page, page_num)
-                all_candidates.extend(ocr_candidates)
-                continue
-            
-            # Extract heading candidates from page
-            page_candidates = _extract_heading_candidates_from_page(page, page_num)
-            all_candidates.extend(page_candidates)
-        
-        # Build hierarchical structure and filter
-        outline_items = _build_document_hierarchy(all_candidates)
+        # Stream potential headings page by page; pages after the one that
+        # completes the outline are never parsed
+        candidates = _iter_document_candidates(pdf, pdf_path, page_workers)
+        try:
+            # Build hierarchical structure and filter
+            outline_items = _build_document_hierarchy(candidates)
+        finally:
+            candidates.close()
     
     return DocumentOutline(title=title, outline=outline_items)
 
+def _iter_document_candidates(pdf, pdf_path, page_workers):
+    """Yield heading candidates in page and position order, extracting pages on demand"""
+    n_pages = len(pdf.pages)
+    executor = None
+    if page_workers > 1 and n_pages >= PARALLEL_MIN_PAGES:
+        executor, page_results = _extract_pages_in_parallel(pdf_path, n_pages, page_workers)
+    else:
+        page_results = (_extract_page_candidates(page, page_num)
+                        for page_num, page in enumerate(pdf.pages, start=1))
+    
+    try:
+        # Scanned pages are held back and OCRed in batches, so Tesseract
+        # starts up once per run of scanned pages rather than once per page
+        scanned = []
+        for page_num, page_candidates in enumerate(page_results, start=1):
+            if page_candidates is None:
+                scanned.append(page_num)
+                if len(scanned) < OCR_BATCH_PAGES:
+                    continue
+            if scanned:
+                yield from _ocr_scanned_pages(pdf, scanned)
+                scanned = []
+            if page_candidates is not None:
+                # Already in position order
+                yield from page_candidates
+        if scanned:
+            yield from _ocr_scanned_pages(pdf, scanned)
+    finally:
+        if executor is not None:
+            # Drop pages still queued when the outline filled up early
+            executor.shutdown(cancel_futures=True)
+
+def _ocr_scanned_pages(pdf, page_nums):
+    """OCR a run of scanned pages in one batch, yielding candidates in page order"""
+    images = [pdf.pages[page_num - 1].to_image(resolution=150).original
+              for page_num in page_nums]
+    ocr_results = _ocr_pages_batch(images, page_nums)
+    for page_num in page_nums:
+        # OCR candidates carry no position, so page order is all that applies
+        yield from ocr_results[page_num]
+
+def _extract_page_candidates(page, page_num):
+    """Extract heading candidates from one page, or None if it needs OCR"""
+    # page.chars is parsed from the page layout on first access; read it once
+    chars = page.chars
+    if not chars:
+        # Scanned page, left for the batched OCR pass
+        return None
+    candidates = _extract_heading_candidates_from_page(chars, page_num)
+    # Each page is visited once, so drop its parsed layout straight away
+    page.flush_cache()
+    return candidates
+
+def _extract_pages_in_parallel(pdf_path, n_pages, page_workers):
+    """Fan pages out to worker processes
+    
+    Returns the executor, which the caller must shut down, and an iterator
+    over per-page candidate lists in page order.
+    """
+    # Page objects don't pickle, so each worker opens its own copy of the document
+    if hasattr(pdf_path, 'getvalue'):
+        source = pdf_path.getvalue()
+    elif hasattr(pdf_path, 'read'):
+        pdf_path.seek(0)
+        source = pdf_path.read()
+    else:
+        source = str(pdf_path)
+    chunksize = max(1, n_pages // (4 * page_workers))
+    executor = ProcessPoolExecutor(max_workers=page_workers, initializer=_init_page_worker,
+                                   initargs=(source,))
+    return executor, executor.map(_extract_page_in_worker, range(1, n_pages + 1),
+                                  chunksize=chunksize)
+
+_worker_pdf = None
+
+def _init_page_worker(source):
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+def _extract_page_in_worker(page_num):
+    return _extract_page_candidates(_worker_pdf.pages[page_num - 1], page_num)
+
 def _extract_document_title_from_first_page(first_page):
     """Extract document title specifically from the first page"""
     if not first_page or not first_page.chars:
@@ -54,91 +287,98 @@ def _extract_document_title_from_first_page(first_page):
     page_text = first_page.extract_text() or ""
     lines = [line.strip() for line in page_text.split('\n') if line.strip()]
     
-    # Look for RFP title pattern in multiple ways
-    title_candidates = []
+    # Classify the leading lines in one pass; the methods below only read
+    # these. No method looks past line 27 (line 20 plus a 7 line lookahead).
+    lowers = [line.lower() for line in lines[:27]]
+    is_rfp_title = []       # Strong RFP title indicators
+    is_rfp_mention = []     # Any RFP reference
+    is_proposal_intro = []  # "to present a proposal" pattern
+    for line_lower in lowers[:20]:
+        mentions_rfp = 'rfp' in line_lower
+        is_rfp_title.append((mentions_rfp and 'request' in line_lower) or 'request for proposal' in line_lower)
+        is_rfp_mention.append(mentions_rfp or 'request for proposal' in line_lower)
+        is_proposal_intro.append('to present' in line_lower and 'proposal' in line_lower)
+    
+    # Look for RFP title pattern in multiple ways, keeping the longest
+    # (first on ties) candidate of the first method that finds any
+    best_candidate = None
     
     # Method 1: Look for explicit RFP patterns
-    for i, line in enumerate(lines[:20]):  # Check first 20 lines
-        line_lower = line.lower()
+    for i, rfp_title in enumerate(is_rfp_title):  # Check first 20 lines
+        if not rfp_title:
+            continue
         
-        # Strong RFP title indicators
-        if ('rfp' in line_lower and 'request' in line_lower) or 'request for proposal' in line_lower:
-            # Try to reconstruct the full title
-            title_parts = []
-            
-            # Look back a few lines for title start
-            start_idx = max(0, i-3)
-            for j in range(start_idx, i+1):
-                if j < len(lines):
-                    candidate_line = lines[j].strip()
-                    if (len(candidate_line) > 5 and 
-                        not re.match(r'^\d+', candidate_line) and
-                        not candidate_line.lower().startswith(('march', 'april', 'january'))):
-                        title_parts.append(candidate_line)
-            
-            # Look ahead for continuation
-            for j in range(i+1, min(i+8, len(lines))):
-                next_line = lines[j].strip()
-                if (next_line and len(next_line) > 5 and
-                    any(word in next_line.lower() for word in 
-                        ['proposal', 'developing', 'business', 'plan', 'ontario', 'digital', 'library']) and
-                    not next_line.lower().startswith(('march', 'april', 'january'))):
-                    title_parts.append(next_line)
-                elif len(next_line) < 80 and not next_line.endswith('.') and next_line:
-                    title_parts.append(next_line)
-                else:
-                    break
-            
-            if title_parts:
-                full_title = ' '.join(title_parts).strip()
-                # Clean up common artifacts
-                full_title = re.sub(r'\s+', ' ', full_title)  # Multiple spaces
-                if len(full_title) > 20:
-                    title_candidates.append(full_title)
+        # Try to reconstruct the full title
+        title_parts = []
+        
+        # Look back a few lines for title start
+        for j in range(max(0, i-3), i+1):
+            candidate_line = lines[j]
+            if (len(candidate_line) > 5 and 
+                not _RE_LEADING_DIGITS.match(candidate_line) and
+                not lowers[j].startswith(('march', 'april', 'january'))):
+                title_parts.append(candidate_line)
+        
+        # Look ahead for continuation
+        for j in range(i+1, min(i+8, len(lines))):
+            next_line = lines[j]
+            if (len(next_line) > 5 and
+                any(word in lowers[j] for word in 
+                    ['proposal', 'developing', 'business', 'plan', 'ontario', 'digital', 'library']) and
+                not lowers[j].startswith(('march', 'april', 'january'))):
+                title_parts.append(next_line)
+            elif len(next_line) < 80 and not next_line.endswith('.'):
+                title_parts.append(next_line)
+            else:
+                break
+        
+        if title_parts:
+            # Clean up common artifacts
+            full_title = ' '.join(' '.join(title_parts).split())  # Multiple spaces
+            if len(full_title) > 20 and (best_candidate is None or len(full_title) > len(best_candidate)):
+                best_candidate = full_title
     
     # Method 2: Look for specific title patterns if no RFP found
-    if not title_candidates:
-        for i, line in enumerate(lines[:15]):
-            line_lower = line.lower()
+    if best_candidate is None:
+        for i, proposal_intro in enumerate(is_proposal_intro[:15]):
+            if not proposal_intro:
+                continue
+            title_parts = [lines[i]]
+            # Look ahead for "for developing" etc.
+            for j in range(i+1, min(i+5, len(lines))):
+                if any(word in lowers[j] for word in ['developing', 'business', 'plan', 'ontario', 'digital', 'library']):
+                    title_parts.append(lines[j])
+                else:
+                    break
             
-            # Look for "to present a proposal" pattern
-            if 'to present' in line_lower and 'proposal' in line_lower:
-                title_parts = [line]
-                # Look ahead for "for developing" etc.
-                for j in range(i+1, min(i+5, len(lines))):
-                    next_line = lines[j].strip()
-                    if (next_line and 
-                        any(word in next_line.lower() for word in ['developing', 'business', 'plan', 'ontario', 'digital', 'library'])):
-                        title_parts.append(next_line)
-                    else:
-                        break
-                
-                if len(title_parts) > 1:
-                    title_candidates.append(' '.join(title_parts))
+            if len(title_parts) > 1:
+                candidate = ' '.join(title_parts)
+                if best_candidate is None or len(candidate) > len(best_candidate):
+                    best_candidate = candidate
     
     # Method 3: Look for business plan patterns
-    if not title_candidates:
-        for line in lines[:10]:
+    if best_candidate is None:
+        for line, line_lower in zip(lines[:10], lowers):
             if (len(line) > 20 and 
-                'business plan' in line.lower() and
-                any(word in line.lower() for word in ['ontario', 'digital', 'library'])):
-                title_candidates.append(line)
+                'business plan' in line_lower and
+                any(word in line_lower for word in ['ontario', 'digital', 'library'])):
+                if best_candidate is None or len(line) > len(best_candidate):
+                    best_candidate = line
     
     # Method 4: Construct from common patterns if found
-    if not title_candidates:
+    if best_candidate is None:
         # Look for key components scattered in first few lines
         rfp_line = None
         proposal_line = None
         business_line = None
         
-        for line in lines[:10]:
-            line_lower = line.lower()
-            if 'rfp' in line_lower or 'request for proposal' in line_lower:
-                rfp_line = line
-            elif 'to present' in line_lower and 'proposal' in line_lower:
-                proposal_line = line  
+        for i, line_lower in enumerate(lowers[:10]):
+            if is_rfp_mention[i]:
+                rfp_line = lines[i]
+            elif is_proposal_intro[i]:
+                proposal_line = lines[i]
             elif 'business plan' in line_lower and 'ontario' in line_lower:
-                business_line = line
+                business_line = lines[i]
         
         # Try to combine found components
         if rfp_line and (proposal_line or business_line):
@@ -147,134 +387,71 @@ def _extract_document_title_from_first_page(first_page):
                 components.append(proposal_line)
             if business_line:
                 components.append(business_line)
-            title_candidates.append(' '.join(components))
+            best_candidate = ' '.join(components)
     
     # Select best candidate
-    if title_candidates:
-        # Prefer longer, more complete titles
-        best_candidate = max(title_candidates, key=len)
-        
+    if best_candidate is not None:
         # Clean up the title
-        best_candidate = re.sub(r'\s+', ' ', best_candidate).strip()
+        best_candidate = ' '.join(best_candidate.split())
         
         # If it's very long, try to truncate sensibly
         if len(best_candidate) > 150:
             # Look for a good break point
-            sentences = best_candidate.split('.')
+            sentences = best_candidate.split('.', 1)
             if len(sentences) > 1 and len(sentences[0]) > 30:
                 best_candidate = sentences[0].strip()
         
         return best_candidate
     
     # Final fallback - look for any substantial line mentioning key terms
-    for line in lines[:8]:
+    for line, line_lower in zip(lines[:8], lowers):
         if (len(line) > 15 and 
-            any(word in line.lower() for word in ['ontario', 'digital', 'library']) and
-            not re.match(r'^\d+', line)):
+            any(word in line_lower for word in ['ontario', 'digital', 'library']) and
+            not _RE_LEADING_DIGITS.match(line)):
             return line
     
     return lines[0] if lines else "Untitled"
 
-def _extract_headings_from_page(page, page_num):
-    """Extract headings from a single page"""
-    headings = []
-    
-    # Get all text lines with font information
-    text_lines = _get_text_lines_with_fonts(page)
-    
-    # Determine font size thresholds for this page
-    font_sizes = [line['avg_size'] for line in text_lines if line['avg_size'] > 0]
-    if not font_sizes:
-        return headings
-    
-    # Calculate thresholds
-    font_sizes.sort(reverse=True)
-    unique_sizes = list(set(font_sizes))
-    unique_sizes.sort(reverse=True)
-    
-    # Set thresholds based on available font sizes
-    if len(unique_sizes) >= 3:
-        h1_threshold = unique_sizes[0]
-        h2_threshold = unique_sizes[1] 
-        h3_threshold = unique_sizes[2]
-    elif len(unique_sizes) == 2:
-        h1_threshold = unique_sizes[0]
-        h2_threshold = unique_sizes[1]
-        h3_threshold = unique_sizes[1]
-    else:
-        h1_threshold = h2_threshold = h3_threshold = unique_sizes[0] if unique_sizes else 12
-    
-    # Analyze each line
-    for line in text_lines:
-        text = line['text']
-        
-        # Skip very short or very long text
-        if len(text) < 3 or len(text) > 250:
-            continue
-        
-        # Calculate heading score
-        score = _calculate_heading_score(line, h1_threshold, h2_threshold, h3_threshold)
-        
-        if score['confidence'] > 0.5:
-            headings.append(OutlineItem(
-                level=score['level'],
-                text=text,
-                page=page_num
-            ))
-    
-    return headings
-
-def _extract_heading_candidates_from_page(page, page_num):
+def _extract_heading_candidates_from_page(chars, page_num):
     """Extract heading candidates with enhanced filtering"""
-    candidates = []
-    
     # Get all text lines with font information
-    text_lines = _get_text_lines_with_fonts(page)
-    
-    # Calculate font size statistics for this page
-    font_sizes = [line['avg_size'] for line in text_lines if line['avg_size'] > 0]
-    if not font_sizes:
-        return candidates
+    lines = _get_text_lines_with_fonts(chars)
     
     # Determine thresholds more intelligently
-    thresholds = _calculate_smart_thresholds(font_sizes, text_lines)
-    
-    # Analyze each line with enhanced scoring
-    for line in text_lines:
-        candidate = _analyze_line_with_enhanced_scoring(line, thresholds, page_num)
-        if candidate:
-            candidates.append(candidate)
+    thresholds = _calculate_smart_thresholds(lines)
+    if thresholds is None:
+        return []
     
-    return candidates
+    # Score every line with enhanced scoring
+    return _score_lines_vectorized(lines, thresholds, page_num)
 
-def _calculate_smart_thresholds(font_sizes, text_lines):
-    """Calculate smarter font size thresholds based on content analysis"""
-    unique_sizes = sorted(set(font_sizes), reverse=True)
+def _calculate_smart_thresholds(lines):
+    """Calculate smarter font size thresholds based on content analysis
+    
+    Returns None when the page has no real font size to calibrate against.
+    """
+    # The one sort of the page's font sizes; everything below indexes into it
+    sizes_seen, size_index = np.unique(lines.size, return_inverse=True)
+    
+    # Largest real font sizes first
+    order = np.flatnonzero(sizes_seen > 0)[::-1]
+    if not order.size:
+        return None
+    sizes_desc = sizes_seen[order]
+    unique_sizes = sizes_desc.tolist()
     
     # Analyze which font sizes are actually used for meaningful content
-    size_usage = {}
-    for line in text_lines:
-        size = line['avg_size']
-        if size not in size_usage:
-            size_usage[size] = {'count': 0, 'total_chars': 0, 'heading_indicators': 0}
-        
-        size_usage[size]['count'] += 1
-        size_usage[size]['total_chars'] += len(line['text'])
-        
-        # Count heading indicators
-        if any(pattern in line['text'].lower() for pattern in 
-               ['summary', 'background', 'appendix', 'phase', 'section']):
-            size_usage[size]['heading_indicators'] += 1
-    
-    # Select sizes that are likely for headings
-    heading_sizes = []
-    for size in unique_sizes:
-        usage = size_usage.get(size, {})
-        avg_length = usage.get('total_chars', 0) / max(usage.get('count', 1), 1)
-        
-        # Prefer sizes used for shorter text (likely headings)
-        if avg_length < 60 or usage.get('heading_indicators', 0) > 0:
-            heading_sizes.append(size)
+    indicators = np.fromiter(
+        (bool(_keyword_hits(text_lower) & _KW_HEADING_INDICATORS) for text_lower in lines.lower),
+        dtype=bool, count=len(lines.text)
+    )
+    counts = np.bincount(size_index)
+    avg_length = np.bincount(size_index, weights=lines.length) / counts
+    heading_indicators = np.bincount(size_index, weights=indicators)
+    
+    # Prefer sizes used for shorter text (likely headings)
+    is_heading_size = (avg_length[order] < 60) | (heading_indicators[order] > 0)
+    heading_sizes = sizes_desc[is_heading_size].tolist()
     
     # Set thresholds based on identified heading sizes
     if len(heading_sizes) >= 3:
@@ -291,92 +468,88 @@ def _calculate_smart_thresholds(font_sizes, text_lines):
             'h3': unique_sizes[2] if len(unique_sizes) > 2 else 12
         }
 
-def _analyze_line_with_enhanced_scoring(line, thresholds, page_num):
-    """Enhanced line analysis with better scoring"""
-    text = line['text'].strip()
-    
-    # Enhanced filtering for non-headings
-    if _is_definitely_not_heading(text):
-        return None
-    
-    # Skip very short or very long text
-    if len(text) < 3 or len(text) > 200:
-        return None
-    
-    # Skip obvious content fragments
-    if _is_content_fragment(text):
-        return None
+_LEVELS = ('H1', 'H2', 'H3', 'H4')
+_LEVEL_CONFIDENCE = np.array([0.4, 0.3, 0.2, 0.1])
+
+def _score_lines_vectorized(lines, thresholds, page_num):
+    """Enhanced line scoring: text heuristics per line, numeric bonuses as array masks"""
+    # Enhanced filtering for non-headings, very short or very long text,
+    # and obvious content fragments
+    # (_is_definitely_not_heading covers the content fragment check)
+    eligible = [i for i, (text, text_lower) in enumerate(zip(lines.text, lines.lower))
+                if 3 <= len(text) <= 200
+                and not _is_definitely_not_heading(text, text_lower)]
+    if not eligible:
+        return []
+    texts = [lines.text[i] for i in eligible]
+    lowers = [lines.lower[i] for i in eligible]
+    rows = np.array(eligible)
+    n_texts = len(texts)
     
-    confidence = 0.0
-    level = 'H4'
+    size = lines.size[rows]
+    length = lines.length[rows]
     
     # Font size scoring with more nuance
-    size = line['avg_size']
-    if size >= thresholds['h1']:
-        confidence += 0.4
-        level = 'H1'
-    elif size >= thresholds['h2']:
-        confidence += 0.3
-        level = 'H2'
-    elif size >= thresholds['h3']:
-        confidence += 0.2
-        level = 'H3'
-    else:
-        confidence += 0.1
-        level = 'H4'
+    tier = np.select(
+        [size >= thresholds['h1'], size >= thresholds['h2'], size >= thresholds['h3']],
+        [0, 1, 2], default=3
+    )
+    confidence = _LEVEL_CONFIDENCE[tier]
     
     # Enhanced pattern analysis
-    pattern_boost, pattern_level = _enhanced_pattern_analysis(text)
-    confidence += pattern_boost
-    if pattern_level and pattern_boost > 0.3:
-        level = pattern_level
-    
-    # Position and formatting bonuses
-    if line['is_bold']:
-        confidence += 0.2
+    patterns = [_enhanced_pattern_analysis(text, text_lower) for text, text_lower in zip(texts, lowers)]
+    confidence = confidence + np.fromiter((boost for boost, _ in patterns), dtype=np.float64, count=n_texts)
     
-    if line['left_margin'] < 80:  # Left aligned
-        confidence += 0.1
+    # Position and formatting bonuses; added one at a time, in the same order
+    # as the per-line version, so the floating point sums match it exactly
+    confidence = confidence + np.where(lines.bold[rows], 0.2, 0.0)
+    confidence = confidence + np.where(lines.left[rows] < 80, 0.1, 0.0)  # Left aligned
     
     # Length scoring (headings are typically shorter)
-    if len(text) < 100:
-        confidence += 0.1
-    if len(text) < 50:
-        confidence += 0.1
+    confidence = confidence + np.where(length < 100, 0.1, 0.0)
+    confidence = confidence + np.where(length < 50, 0.1, 0.0)
     
     # Bonus for complete, well-formed headings
-    if _is_well_formed_heading(text):
-        confidence += 0.2
+    well_formed = np.fromiter(map(_is_well_formed_heading, texts), dtype=bool, count=n_texts)
+    confidence = confidence + np.where(well_formed, 0.2, 0.0)
     
     # Penalty for incomplete or fragmented text
-    if _is_incomplete_heading(text):
-        confidence -= 0.3
+    incomplete = np.fromiter(map(_is_incomplete_heading, texts), dtype=bool, count=n_texts)
+    confidence = confidence - np.where(incomplete, 0.3, 0.0)
     
-    # Only include high-confidence candidates
-    if confidence > 0.55:  # Further reduced threshold to catch more sections
-        return {
-            'text': text,
-            'level': level,
-            'page': page_num,
-            'confidence': min(confidence, 1.0),
-            'font_size': size,
-            'position': line.get('y_pos', 0)
-        }
+    # Only include high-confidence candidates, ordered by position with a
+    # stable sort on the y column, as the hierarchy sweep expects
+    accepted = np.flatnonzero(confidence > 0.55)  # Further reduced threshold to catch more sections
+    accepted = accepted[np.argsort(lines.y[rows[accepted]], kind='stable')]
+    candidates = []
+    for j in accepted.tolist():
+        pattern_boost, pattern_level = patterns[j]
+        level = pattern_level if pattern_level and pattern_boost > 0.3 else _LEVELS[tier[j]]
+        row = eligible[j]
+        candidates.append(_Candidate(
+            text=texts[j],
+            text_lower=lowers[j],
+            level=level,
+            page=page_num,
+            confidence=min(float(confidence[j]), 1.0),
+            font_size=float(lines.size[row]),
+            position=int(lines.y[row])
+        ))
     
-    return None
+    return candidates
 
-def _is_content_fragment(text):
+def _is_content_fragment(text, text_lower):
     """Check if text is a content fragment rather than a heading"""
     # Fragments that are clearly middle of sentences
-    if text.startswith(('and ', 'or ', 'but ', 'the ', 'a ', 'an ', 'of ', 'in ', 'to ', 'for ')):
+    if text.startswith(_FRAGMENT_STARTS):
         return True
     
     # Fragments ending mid-sentence
-    if text.endswith((' and', ' or', ' of', ' in', ' to', ' for', ' the', ' a')):
+    if text.endswith(_FRAGMENT_ENDS):
         return True
     
     # Timeline fragments
-    if re.match(r'^\w+ \d{4}\s*-?\s*$', text) or 'timeline:' in text.lower():
+    if _RE_TIMELINE_FRAGMENT.match(text) or 'timeline:' in text_lower:
         return True
     
     # Very incomplete sentences
@@ -392,16 +565,8 @@ def _is_well_formed_heading(text):
         return True
     
     # Proper section titles
-    section_patterns = [
-        r'^(Summary|Background|Introduction|Overview|Conclusion)$',
-        r'^Appendix [A-Z]:', 
-        r'^Phase [IVX]+:',
-        r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*:$',  # Title case ending with colon
-        r'^\d+\.\s+[A-Z][a-z]+'  # Numbered sections
-    ]
-    
-    for pattern in section_patterns:
-        if re.match(pattern, text, re.IGNORECASE):
+    for pattern in _WELL_FORMED_SECTION_PATTERNS:
+        if pattern.match(text):
             return True
     
     # "For each/For the" patterns that are complete
@@ -413,11 +578,11 @@ def _is_well_formed_heading(text):
 def _is_incomplete_heading(text):
     """Check if text appears to be an incomplete heading"""
     # Ends mid-sentence
-    if text.endswith((' to', ' and', ' or', ' of', ' in', ' for', ' the', ' a', ' an')):
+    if text.endswith(_INCOMPLETE_ENDS):
         return True
     
     # Starts mid-sentence  
-    if text.startswith(('to ', 'and ', 'or ', 'of ', 'in ', 'for ')):
+    if text.startswith(_INCOMPLETE_STARTS):
         return True
     
     # Contains partial words or obvious breaks
@@ -426,35 +591,30 @@ def _is_incomplete_heading(text):
     
     return False
 
-def _enhanced_pattern_analysis(text):
+def _enhanced_pattern_analysis(text, text_lower):
     """Enhanced pattern analysis with better scoring"""
     boost = 0.0
     suggested_level = None
     
-    text_lower = text.lower().strip()
+    hits = _keyword_hits(text_lower)
     
     # Document structure patterns (H1 level)
-    document_structure = [
-        'revision history', 'table of contents', 'acknowledgements', 
-        'references', 'introduction to the foundation',
-        'overview of the foundation'
-    ]
-    if any(pattern in text_lower for pattern in document_structure):
+    if hits & _KW_DOCUMENT_STRUCTURE:
         return 0.9, 'H1'
     
     # Numbered main sections (H1 level)
-    if re.match(r'^\d+\.\s+[A-Z][a-z]', text):
+    if _RE_NUMBERED_MAIN.match(text):
         return 0.9, 'H1'
     
     # Numbered subsections (H2 level)  
-    if re.match(r'^\d+\.\d+\s+[A-Z][a-z]', text):
+    if _RE_NUMBERED_SUB.match(text):
         return 0.8, 'H2'
     
     # Strong heading patterns
-    if re.match(r'^appendix [a-z]:', text, re.IGNORECASE):
+    if _RE_APPENDIX.match(text):
         return 0.8, 'H2'  # Increased confidence
     
-    if re.match(r'^phase [ivx]+:', text, re.IGNORECASE):
+    if _RE_PHASE.match(text):
         return 0.7, 'H3'  # Increased confidence
     
     # Major section headers (enhanced)
@@ -463,8 +623,7 @@ def _enhanced_pattern_analysis(text):
         return 0.8, 'H2'  # Increased confidence
     
     # Career/Learning/Business related subsections
-    career_learning = ['intended audience', 'career paths', 'learning objectives', 'entry requirements', 'structure and course', 'keeping it current', 'business outcomes', 'content', 'trademarks', 'documents and web']
-    if any(pattern in text_lower for pattern in career_learning):
+    if hits & _KW_CAREER_LEARNING:
         return 0.8, 'H2'
     
     # Subsection patterns (enhanced)
@@ -475,11 +634,7 @@ def _enhanced_pattern_analysis(text):
         return 0.6, 'H3'
     
     # Business plan specific patterns
-    business_patterns = [
-        'business plan', 'approach and specific', 'evaluation and awarding', 
-        'milestones', 'requirements', 'terms of reference'
-    ]
-    if any(pattern in text_lower for pattern in business_patterns):
+    if hits & _KW_BUSINESS_PATTERNS:
         return 0.7, 'H2'  # Increased confidence
     
     # Single word important sections
@@ -490,7 +645,7 @@ def _enhanced_pattern_analysis(text):
     # Colon endings (subheadings)
     if text.endswith(':') and len(text) < 80 and len(text) > 3:
         # Check if it's a principle or service (H3) vs specific item (H4)
-        if any(word in text_lower for word in ['funding', 'governance', 'decision-making', 'access', 'support', 'training']):
+        if hits & _KW_SUBHEADING_TERMS:
             return 0.6, 'H3'
         return 0.5, 'H3'
     
@@ -501,180 +656,140 @@ def _enhanced_pattern_analysis(text):
     return boost, suggested_level
 
 def _build_document_hierarchy(candidates):
-    """Build hierarchical document structure using Node-based path tracking"""
-    if not candidates:
-        return []
+    """Build hierarchical document structure in a single filtering sweep
     
-    # Sort candidates by page and position
-    candidates.sort(key=lambda x: (x['page'], x.get('position', 0)))
-    
-    # Create a node-like structure for tracking hierarchy and paths
-    class DocumentNode:
-        def __init__(self):
-            self.next = {}  # Similar to unordered_map<string, Node*>
-            self.path = []  # Similar to vector<string> path
-            self.mark = False  # Similar to bool mark
-            self.text = ""
-            self.level = ""
-            self.page = 0
-            self.confidence = 0.0
-    
-    root = DocumentNode()
-    current_path = []
+    candidates must already be in page and position order; it may be a lazy
+    iterator, which is only consumed up to the last accepted heading.
+    """
     final_headings = []
     seen_texts = set()
+    # Lowered text, word set and word signature of the last few accepted headings
+    recent_headings = deque(maxlen=3)
     
-    # Process candidates with path-aware filtering
+    # Process candidates in reading order
     for candidate in candidates:
-        text = candidate['text']
-        level = candidate['level']
-        page = candidate['page']
-        confidence = candidate['confidence']
+        text = candidate.text
         
         # Skip duplicates
-        text_key = text.lower().strip()
+        text_key = candidate.text_lower
         if text_key in seen_texts:
             continue
         
-        # Enhanced quality filtering using Node-based logic
-        if not _node_quality_check(candidate, current_path, final_headings):
+        # Enhanced quality filtering
+        words = frozenset(text_key.split())
+        signature = _word_signature(words)
+        if not _passes_quality_checks(candidate, text_key, words, signature, recent_headings):
             continue
         
-        # Create node for this heading
-        node = DocumentNode()
-        node.text = text
-        node.level = level
-        node.page = page
-        node.confidence = confidence
-        node.path = current_path.copy()
-        
-        # Update path based on heading hierarchy
-        current_path = _update_path_with_hierarchy(current_path, level, text)
-        node.path = current_path.copy()
-        
-        # Mark node as valid heading
-        node.mark = True
         seen_texts.add(text_key)
-        
-        # Add to final results if it passes all checks
+        recent_headings.append((text_key, words, signature))
         final_headings.append(OutlineItem(
-            level=level,
+            level=candidate.level,
             text=text,
-            page=page
+            page=candidate.page
         ))
+        if len(final_headings) == 40:  # Increased limit to match expected output
+            break
     
-    return final_headings[:40]  # Increased limit to match expected output
+    return final_headings
 
-def _node_quality_check(candidate, current_path, existing_headings):
-    """Enhanced quality check using Node-based path analysis"""
-    text = candidate['text']
-    level = candidate['level']
-    confidence = candidate['confidence']
+def _passes_quality_checks(candidate, text_key, words, signature, recent_headings):
+    """Enhanced quality check for a heading candidate"""
+    text = candidate.text
+    confidence = candidate.confidence
     
     # Lowered confidence threshold to capture more valid headings
     if confidence < 0.6:  # Reduced from 0.7
         return False
     
     # Enhanced fragment detection
-    if _is_sentence_fragment(text):
+    if _is_sentence_fragment(text, text_key):
         return False
     
-    # Check path consistency
-    if _breaks_hierarchy_path(candidate, current_path):
+    # Check hierarchy consistency
+    if _breaks_hierarchy_path(candidate):
         return False
     
     # Enhanced content validation
-    if not _is_meaningful_heading(text):
+    if not _is_meaningful_heading(text, text_key):
         return False
     
     # Context-aware duplicate checking
-    if _is_contextual_duplicate(text, existing_headings):
+    if _is_contextual_duplicate(text_key, words, signature, recent_headings):
         return False
     
     return True
 
-def _is_sentence_fragment(text):
+def _is_sentence_fragment(text, text_lower):
     """Detect sentence fragments that shouldn't be headings"""
     # Don't filter out important single word sections
-    important_singles = ['summary', 'background', 'timeline', 'milestones', 'preamble', 'membership', 'chair', 'term', 'meetings', 'acknowledgements', 'references', 'content', 'trademarks']
-    if text.lower().strip() in important_singles:
+    if text_lower in _IMPORTANT_SINGLE_WORDS:
         return False
     
     # Don't filter out document structure headers
-    document_headers = [
-        'revision history', 'table of contents', 'acknowledgements',
-        'references', 'trademarks', 'documents and web sites'
-    ]
-    if any(header in text.lower() for header in document_headers):
+    hits = _keyword_hits(text_lower)
+    if hits & _KW_DOCUMENT_HEADERS:
         return False
     
     # Don't filter out numbered sections
-    if re.match(r'^\d+\.\s+[A-Za-z]', text) or re.match(r'^\d+\.\d+\s+[A-Za-z]', text):
+    if _RE_NUMBERED_MAIN_ANY.match(text) or _RE_NUMBERED_SUB_ANY.match(text):
         return False
     
     # Starts with lowercase or mid-sentence words (but allow technical terms)
-    if text and text[0].islower() and not any(term in text.lower() for term in ['intended audience', 'career paths', 'learning objectives']):
+    if text and text[0].islower() and not hits & _KW_TECHNICAL_TERMS:
         return True
     
     # Contains obvious sentence continuations
-    fragment_indicators = [
-        ' is to ', ' are to ', ' will be ', ' has been ', ' have been ',
-        ' can be ', ' should be ', ' must be ', ' to be ', ' that ',
-        ' which ', ' where ', ' when ', ' while ', ' during '
-    ]
-    if any(indicator in text.lower() for indicator in fragment_indicators):
+    if hits & _KW_FRAGMENT_INDICATORS:
         return True
     
     # Ends with incomplete phrases (but not colon endings which are headers)
-    if text.endswith((' to', ' and', ' or', ' of', ' in', ' for', ' the', ' a', ' an', ' that', ' which')) and not text.endswith(':'):
+    if text.endswith(_SENTENCE_FRAGMENT_ENDS) and not text.endswith(':'):
         return True
     
     # Very incomplete sentences (less than 2 words and not a proper heading)
     words = text.split()
-    if len(words) < 2 and not text.endswith(':') and not text.isupper() and text.lower() not in important_singles:
+    if len(words) < 2 and not text.endswith(':') and not text.isupper() and text_lower not in _IMPORTANT_SINGLE_WORDS:
         return True
     
     return False
 
-def _breaks_hierarchy_path(candidate, current_path):
+def _breaks_hierarchy_path(candidate):
     """Check if candidate breaks logical hierarchy path"""
-    text = candidate['text']
-    level = candidate['level']
+    text = candidate.text
+    text_lower = candidate.text_lower
     
     # Skip timeline entries that break hierarchy
-    if re.match(r'^\d{4}[\s\-]', text) or 'timeline:' in text.lower():
+    if _RE_TIMELINE_YEAR.match(text) or 'timeline:' in text_lower:
         return True
     
     # Skip financial data that breaks hierarchy
-    if re.match(r'^[\d\$,.\s%\-\(\)]+$', text):
+    if _consists_of(text, _FINANCIAL_CHARS):
         return True
     
     # Skip obvious page headers/footers
-    if len(text) < 10 and (text.isdigit() or re.match(r'^page \d+', text.lower())):
+    if len(text) < 10 and (text.isdigit() or _RE_PAGE_NUMBER.match(text_lower)):
         return True
     
     return False
 
-def _is_meaningful_heading(text):
+def _is_meaningful_heading(text, text_lower):
     """Check if text represents a meaningful heading"""
     # Must have substantial content
     if len(text.strip()) < 2:  # Further reduced
         return False
     
     # Should not be pure numbers or symbols
-    if re.match(r'^[\d\s\-\.\(\)]+$', text):
+    if _consists_of(text, _NUMBERS_AND_SYMBOLS_CHARS):
         return False
     
     # Should not be email addresses or URLs
-    if '@' in text or text.startswith(('http://', 'https://', 'www.')):
+    if '@' in text or text.startswith(_URL_PREFIXES):
         return False
     
-    # Document structure headers (high priority)
-    document_headers = [
-        'revision history', 'table of contents', 'acknowledgements',
-        'references', 'trademarks', 'documents and web sites'
-    ]
-    if any(header in text.lower() for header in document_headers):
+    # Accept rules, cheapest first; any one of them is enough
+    # Accept single important words that are clear headings (enhanced)
+    if text_lower in _IMPORTANT_SINGLE_WORDS:
         return True
     
     # Prefer headings that end with colons or are complete phrases
@@ -682,63 +797,24 @@ def _is_meaningful_heading(text):
         return True
     
     # Accept well-formed questions
-    if text.startswith(('What ', 'How ', 'Why ', 'When ', 'Where ')) and text.endswith('?'):
-        return True
-    
-    # Accept numbered sections (enhanced)
-    if re.match(r'^\d+\.\s+[A-Za-z]', text):
-        return True
-    
-    # Accept numbered subsections
-    if re.match(r'^\d+\.\d+\s+[A-Za-z]', text):
-        return True
-    
-    # Accept lettered appendices (enhanced)
-    if re.match(r'^Appendix [A-Z]:', text, re.IGNORECASE):
+    if text.startswith(_QUESTION_STARTS) and text.endswith('?'):
         return True
     
-    # Accept proper section titles (enhanced)
-    section_patterns = [
-        r'^(Summary|Background|Introduction|Overview|Conclusion|Timeline|Milestones|Acknowledgements|References)$',
-        r'^Appendix [A-Z]:',
-        r'^Phase [IVX]+:',
-        r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*:$',
-        r'^\d+\.\s+[A-Z][a-z]+',
-        r'^(Chair|Term|Meetings|Membership|Preamble|Content|Audience|Duration|Outcomes|Trademarks)$'
-    ]
-    
-    for pattern in section_patterns:
-        if re.match(pattern, text, re.IGNORECASE):
-            return True
-    
     # Accept "For each/For the" patterns (enhanced for H4)
     if text.startswith(('For each ', 'For the ', 'For each Ontario')):
         return True
     
-    # Accept business/technical terms (enhanced)
-    business_terms = [
-        'business plan', 'requirements', 'evaluation', 'approach', 
-        'implementation', 'methodology', 'milestones', 'funding',
-        'terms of reference', 'accountability', 'communication',
-        'intended audience', 'career paths', 'learning objectives',
-        'entry requirements', 'structure and course', 'keeping it current',
-        'business outcomes', 'documents and web sites'
-    ]
-    if any(term in text.lower() for term in business_terms) and len(text) < 120:
+    # Document structure headers and business/technical terms, in one scan
+    hits = _keyword_hits(text_lower)
+    if hits & _KW_DOCUMENT_HEADERS or (hits & _KW_BUSINESS_TERMS and len(text) < 120):
         return True
     
-    # Accept single important words that are clear headings (enhanced)
-    important_single_words = [
-        'summary', 'background', 'timeline', 'milestones', 'preamble',
-        'membership', 'chair', 'term', 'meetings', 'acknowledgements',
-        'references', 'content', 'trademarks'
-    ]
-    if text.lower().strip() in important_single_words:
+    # Numbered sections, lettered appendices and proper section titles
+    if _RE_MEANINGFUL_HEADING.match(text):
         return True
     
     # Reject obvious sentence fragments
-    if any(text.lower().startswith(start) for start in 
-           ['the ', 'a ', 'an ', 'and ', 'or ', 'but ', 'to ', 'of ', 'in ', 'for ']):
+    if text_lower.startswith(_FRAGMENT_STARTS):
         return False
     
     # Accept if it looks like a proper heading (title case, reasonable length)
@@ -751,94 +827,42 @@ def _is_meaningful_heading(text):
     
     return False
 
-def _is_contextual_duplicate(text, existing_headings):
-    """Check for contextual duplicates using path analysis"""
-    if not existing_headings:
-        return False
-    
-    # Simple similarity check with recent headings
-    recent_headings = existing_headings[-3:]  # Check last 3 headings
-    
-    for heading in recent_headings:
+def _word_signature(words):
+    """64-bit signature with one bit set per word; disjoint signatures mean disjoint word sets"""
+    signature = 0
+    for word in words:
+        signature |= 1 << (hash(word) & 63)
+    return signature
+
+def _is_contextual_duplicate(text_key, words, signature, recent_headings):
+    """Check for contextual duplicates among the last few accepted headings"""
+    for recent_key, recent_words, recent_signature in recent_headings:
         # Exact match
-        if text.lower().strip() == heading.text.lower().strip():
+        if text_key == recent_key:
             return True
         
-        # Very high overlap
-        words1 = set(text.lower().split())
-        words2 = set(heading.text.lower().split())
+        # No shared word, so no overlap to measure; only headings whose
+        # signatures intersect pay for the exact set comparison
+        if not signature & recent_signature:
+            continue
         
-        if words1 and words2:
-            overlap = len(words1.intersection(words2))
-            min_len = min(len(words1), len(words2))
+        # Very high overlap
+        if words and recent_words:
+            overlap = len(words & recent_words)
+            min_len = min(len(words), len(recent_words))
             if overlap / min_len > 0.8:
                 return True
     
     return False
 
-def _update_path_with_hierarchy(current_path, level, text):
-    """Update path based on heading hierarchy (similar to Node path tracking)"""
-    # Determine hierarchy depth
-    hierarchy_depth = {'H1': 0, 'H2': 1, 'H3': 2, 'H4': 3}
-    depth = hierarchy_depth.get(level, 3)
-    
-    # Truncate path to appropriate depth
-    new_path = current_path[:depth] if depth < len(current_path) else current_path.copy()
-    
-    # Add current heading to path
-    new_path.append(text[:50])  # Truncate long headings in path
-    
-    return new_path
-
-def _passes_final_quality_check(candidate, existing_headings):
-    """Final quality check for heading candidates"""
-    text = candidate['text']
-    
-    # Check if this adds value to existing headings
-    if len(existing_headings) > 0:
-        last_heading = existing_headings[-1]
-        
-        # Skip if very similar to previous heading
-        if _texts_too_similar(text, last_heading.text):
-            return False
-        
-        # Skip if this looks like a continuation of previous
-        if (candidate['page'] == last_heading.page and 
-            len(text) < 30 and len(last_heading.text) < 30):
-            return False
-    
-    # Must meet minimum quality standards
-    if candidate['confidence'] < 0.65:
-        return False
-    
-    # Skip financial/numeric data that slipped through
-    if re.match(r'^[\d\$,.\s%\-$]+$', text):
-        return False
-    
-    return True
-
-def _texts_too_similar(text1, text2):
-    """Check if two texts are too similar"""
-    # Simple similarity check
-    words1 = set(text1.lower().split())
-    words2 = set(text2.lower().split())
-    
-    if not words1 or not words2:
-        return False
-    
-    overlap = len(words1.intersection(words2))
-    min_len = min(len(words1), len(words2))
-    
-    return overlap / min_len > 0.8
-
-def _is_definitely_not_heading(text):
+def _is_definitely_not_heading(text, text_lower):
     """Enhanced check if text is definitely not a heading"""
     # Combine original checks with new ones
     if _is_non_heading(text):
         return True
         
     # Additional checks for content fragments
-    if _is_content_fragment(text):
+    if _is_content_fragment(text, text_lower):
         return True
         
     # Very short words or abbreviations
@@ -851,151 +875,49 @@ def _is_definitely_not_heading(text):
         
     return False
 
-def _get_text_lines_with_fonts(page):
-    """Get text lines with font information"""
-    lines = []
-    
-    # Group characters by Y coordinate (lines)
-    y_groups = {}
-    for char in page.chars:
-        y = round(char.get('y0', 0))
-        if y not in y_groups:
-            y_groups[y] = []
-        y_groups[y].append(char)
-    
-    # Process each line
-    for y in sorted(y_groups.keys(), reverse=True):
-        chars = sorted(y_groups[y], key=lambda x: x.get('x0', 0))
+# Text lines as parallel columns: text and its lowercase form are lists,
+# the rest are NumPy arrays
+LinesSoA = namedtuple('LinesSoA', ['text', 'lower', 'size', 'bold', 'left', 'y', 'length'])
+
+def _get_text_lines_with_fonts(page_chars):
+    """Get text lines with font information, top of the page first"""
+    texts, sizes, bolds, lefts, ys = [], [], [], [], []
+    
+    # Group characters by Y coordinate (lines), left to right within a line
+    chars = sorted(page_chars, key=lambda char: (-round(char.get('y0', 0)), char.get('x0', 0)))
+    for neg_y, line_chars in groupby(chars, key=lambda char: -round(char.get('y0', 0))):
+        line_chars = list(line_chars)
         
         # Reconstruct text
-        text = ''.join(char['text'] for char in chars).strip()
+        text = ''.join(char['text'] for char in line_chars).strip()
         if not text:
             continue
         
         # Calculate properties
-        sizes = [char.get('size', 12) for char in chars]
-        avg_size = sum(sizes) / len(sizes) if sizes else 12
-        max_size = max(sizes) if sizes else 12
-        
-        left_margin = min(char.get('x0', 0) for char in chars)
+        char_sizes = [char.get('size', 12) for char in line_chars]
+        texts.append(text)
+        sizes.append(sum(char_sizes) / len(char_sizes))
+        lefts.append(min(char.get('x0', 0) for char in line_chars))
+        ys.append(-neg_y)
         
         # Check for bold
-        fonts = [char.get('fontname', '') for char in chars]
-        is_bold = any('bold' in font.lower() for font in fonts if font)
-        
-        lines.append({
-            'text': text,
-            'avg_size': avg_size,
-            'max_size': max_size,
-            'left_margin': left_margin,
-            'is_bold': is_bold,
-            'y_pos': y
-        })
-    
-    return lines
-
-def _calculate_heading_score(line, h1_thresh, h2_thresh, h3_thresh):
-    """Calculate heading score for a text line"""
-    text = line['text']
-    confidence = 0.0
-    level = 'H4'
-    
-    # Font size scoring
-    if line['avg_size'] >= h1_thresh:
-        confidence += 0.4
-        level = 'H1'
-    elif line['avg_size'] >= h2_thresh:
-        confidence += 0.3
-        level = 'H2'
-    elif line['avg_size'] >= h3_thresh:
-        confidence += 0.2
-        level = 'H3'
-    else:
-        confidence += 0.1
-        level = 'H4'
-    
-    # Bold text bonus
-    if line['is_bold']:
-        confidence += 0.2
-    
-    # Position bonus (left-aligned)
-    if line['left_margin'] < 100:
-        confidence += 0.1
-    
-    # Length analysis (shorter is more likely to be heading)
-    if len(text) < 80:
-        confidence += 0.1
-    if len(text) < 40:
-        confidence += 0.1
-    
-    # Pattern analysis
-    pattern_boost, pattern_level = _analyze_text_patterns(text)
-    confidence += pattern_boost
-    if pattern_level and pattern_boost > 0.25:
-        level = pattern_level
-    
-    # Penalty for obvious non-headings
-    if _is_non_heading(text):
-        confidence -= 0.4
-    
-    return {'confidence': min(confidence, 1.0), 'level': level}
-
-def _analyze_text_patterns(text):
-    """Analyze text patterns for heading indicators"""
-    boost = 0.0
-    suggested_level = None
-    
-    text_lower = text.lower().strip()
-    
-    # Appendix patterns
-    if re.match(r'^appendix [a-z]:', text, re.IGNORECASE):
-        return 0.6, 'H2'
-    
-    # Phase patterns  
-    if re.match(r'^phase [ivx]+:', text, re.IGNORECASE):
-        return 0.5, 'H3'
-    
-    # Numbered sections
-    if re.match(r'^\d+\.\s+[A-Za-z]', text):
-        return 0.5, 'H3'
-    if re.match(r'^\d+\.\d+\s+[A-Za-z]', text):
-        return 0.4, 'H4'
-    
-    # Common section headers
-    section_headers = [
-        'summary', 'background', 'introduction', 'overview', 'approach',
-        'requirements', 'evaluation', 'timeline', 'milestones', 'methodology',
-        'conclusion', 'results', 'discussion'
-    ]
-    if any(header in text_lower for header in section_headers) and len(text) < 50:
-        return 0.4, 'H2'
-    
-    # Question patterns for subsections
-    if text.startswith(('What ', 'How ', 'Why ', 'For each ', 'For the ')):
-        return 0.3, 'H3'
-    
-    # Colon endings (subheadings)
-    if text.endswith(':') and len(text) < 100 and len(text) > 5:
-        return 0.3, 'H3'
-    
-    # All caps titles
-    if text.isupper() and 8 < len(text) < 60:
-        return 0.4, 'H2'
-    
-    # Title case with key terms
-    if (text.istitle() and 
-        any(word in text_lower for word in ['ontario', 'digital', 'library', 'business', 'plan'])):
-        if len(text) > 30:
-            return 0.4, 'H1'
-        else:
-            return 0.3, 'H2'
-    
-    return boost, suggested_level
+        bolds.append(any('bold' in char.get('fontname', '').lower()
+                         for char in line_chars if char.get('fontname', '')))
+    
+    return LinesSoA(
+        text=texts,
+        lower=[text.lower() for text in texts],
+        size=np.array(sizes, dtype=np.float64),
+        bold=np.array(bolds, dtype=bool),
+        left=np.array(lefts, dtype=np.float64),
+        y=np.array(ys, dtype=np.int64),
+        length=np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    )
 
 def _is_non_heading(text):
     """Check if text is definitely not a heading"""
     # Dates
-    if re.match(r'^\w+\s+\d{1,2},?\s+\d{4}', text):
+    if _RE_DATE.match(text):
         return True
     
     # Email addresses  
@@ -1003,7 +925,7 @@ def _is_non_heading(text):
         return True
     
     # URLs
-    if text.startswith(('http://', 'https://', 'www.')):
+    if text.startswith(_URL_PREFIXES):
         return True
     
     # Complete sentences (end with period, not colon)
@@ -1011,7 +933,7 @@ def _is_non_heading(text):
         return True
     
     # Pure numbers/data
-    if re.match(r'^[\d\$,.\s%\-]+$', text):
+    if _consists_of(text, _NUMERIC_DATA_CHARS):
         return True
     
     # Very fragmented text
@@ -1023,13 +945,14 @@ def _is_non_heading(text):
 # ------------------------------------------------------------------
 # OCR helper for scanned pages  
 # ------------------------------------------------------------------
-def _ocr_page(page, page_num):
-    """Enhanced OCR processing for scanned pages"""
-    img = page.to_image(resolution=150).original
-    
-    # Detect language for better OCR
+def _ocr_pages_batch(images, page_nums):
+    """Enhanced OCR processing for scanned pages, in a single Tesseract run"""
+    # Detect language for better OCR, sampling the first scanned page
     try:
-        sample_text = pytesseract.image_to_string(img)[:200]
+        # langdetect loads its language profiles on import; only pay for
+        # that when a document actually needs OCR
+        from langdetect import detect
+        sample_text = pytesseract.image_to_string(images[0])[:200]
         lang = detect(sample_text) if sample_text.strip() else "eng"
         
         # Map common language codes to tesseract language codes
@@ -1045,23 +968,37 @@ def _ocr_page(page, page_num):
     except:
         tesseract_lang = 'eng'
     
-    # Get detailed OCR data
-    data = pytesseract.image_to_data(
-        img, lang=tesseract_lang, output_type=pytesseract.Output.DICT
-    )
-    
-    candidates = []
-    for i, height in enumerate(data["height"]):
-        confidence = int(data["conf"][i])
+    # Tesseract reads a text file listing image paths as one multi-page input
+    with tempfile.TemporaryDirectory(prefix='ocr_') as tmp_dir:
+        paths = []
+        for i, img in enumerate(images):
+            path = os.path.join(tmp_dir, f"page_{i}.png")
+            img.save(path)
+            paths.append(path)
+        list_path = os.path.join(tmp_dir, "list.txt")
+        with open(list_path, 'w') as f:
+            f.write('\n'.join(paths) + '\n')
+        
+        # Get detailed OCR data
+        data = pytesseract.image_to_data(
+            list_path, lang=tesseract_lang, output_type=pytesseract.Output.DICT
+        )
+    
+    # The TSV page_num column counts images in list order
+    candidates = {page_num: [] for page_num in page_nums}
+    for i, image_num in enumerate(data["page_num"]):
+        confidence = int(float(data["conf"][i]))
         text = data["text"][i]
         
         if confidence > 30 and text.strip():
-            candidates.append({
-                'text': text.strip(),
-                'level': 'H3',  # Default level for OCR
-                'page': page_num,
-                'confidence': min(0.8, confidence / 100.0),
-                'source': 'ocr'
-            })
+            page_num = page_nums[int(image_num) - 1]
+            candidates[page_num].append(_Candidate(
+                text=text.strip(),
+                text_lower=text.strip().lower(),
+                level='H3',  # Default level for OCR
+                page=page_num,
+                confidence=min(0.8, confidence / 100.0),
+                source='ocr'
+            ))
     
     return candidates
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 # main.py
 
-import json, sys, time
+import functools, hashlib, io, json, logging, os, sys, time
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import MemoryHandler
 from pathlib import Path
 from datetime import datetime, timezone
-import pdfplumber
+import pypdfium2 as pdfium
 
-from src.extractor import extract_outline, extract_section_content
+from src import extractor
+from src.extractor import extract_outline, extract_section_content, close_all_pdfs
 from src.relevance import SemanticRanker
 
 # Docker paths
@@ -14,21 +18,81 @@ INPUT_DIR  = Path("/app/input")
 OUTPUT_DIR = Path("/app/output")
 INPUT_JSON = INPUT_DIR / "challenge1b_input.json"
 OUTPUT_JSON = OUTPUT_DIR / "challenge1b_output.json"
+CACHE_DIR  = Path("/app/cache")
+# Cache keys are salted with the extractor source, so changing it invalidates
+# earlier outlines and sections; bump CACHE_FORMAT when the cached JSON changes
+CACHE_FORMAT = 1
+CACHE_SALT = hashlib.sha256(f"{CACHE_FORMAT}\0".encode() + Path(extractor.__file__).read_bytes()).hexdigest()[:16]
+# Output is compact JSON unless PRETTY_JSON is set (handy when debugging)
+PRETTY_JSON = bool(os.getenv("PRETTY_JSON"))
 
-def _extract_fallback_document_content(pdf_path: str, doc_name: str) -> str:
-    """Extract meaningful content from a document when no proper headings are found"""
+log = logging.getLogger("r1b")
+
+def _configure_logging():
+    """Batch progress messages in memory and write them to stdout in bulk
+    
+    Warnings and errors go straight to stderr and flush the batch first, so
+    the relative order of messages is preserved.
+    """
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.addFilter(lambda record: record.levelno < logging.WARNING)
+    stderr_handler = logging.StreamHandler(sys.stderr)
+    stderr_handler.setLevel(logging.WARNING)
+    buffered = MemoryHandler(capacity=1000, flushLevel=logging.WARNING, target=stdout_handler)
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[buffered, stderr_handler])
+
+def _flush_logs():
+    """Write out buffered messages, e.g. before forking workers that inherit the buffer"""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+@functools.lru_cache(maxsize=None)
+def _get_ranker() -> SemanticRanker:
+    """Load the sentence-transformer model once per process"""
+    return SemanticRanker(cache_dir=str(CACHE_DIR))
+
+def _load_cached(cache_path: Path):
+    """Return the JSON value stored at cache_path, or None on a cache miss"""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        return orjson.loads(cache_path.read_bytes())
+    except FileNotFoundError:
+        return None
+
+def _store_cached(cache_path: Path, value):
+    """Atomically write a JSON value to the on-disk cache"""
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(orjson.dumps(value))
+    os.replace(tmp_path, cache_path)
+
+def _outline_cache_path(pdf_hash: str) -> Path:
+    return CACHE_DIR / f"{pdf_hash}-{CACHE_SALT}.outline.json"
+
+def _section_cache_path(pdf_hash: str, section: dict) -> Path:
+    key = hashlib.sha256(f"{CACHE_SALT}\0{pdf_hash}\0{section['page']}\0{section['text']}".encode()).hexdigest()
+    return CACHE_DIR / f"{key}.section.json"
+
+@functools.lru_cache(maxsize=None)
+def _extract_fallback_document_content(pdf_file: io.BytesIO, doc_name: str) -> str:
+    """Extract meaningful content from a document when no proper headings are found
+    
+    Memoized so sections of the same document that fall back share one parse.
+    """
+    try:
+        # Only raw text is needed here, so use the C-backed pdfium text layer
+        pdf = pdfium.PdfDocument(pdf_file.getvalue())
+        try:
             # Try to extract from first few pages
             content_parts = []
-            for page_num in range(min(3, len(pdf.pages))):  # First 3 pages max
-                page = pdf.pages[page_num]
-                text = page.extract_text()
+            for page_num in range(min(3, len(pdf))):  # First 3 pages max
+                text = pdf[page_num].get_textpage().get_text_range()
                 if text and text.strip():
                     # Clean and limit the text
                     clean_text = ' '.join(text.split())
                     if len(clean_text) > 100:  # Only use substantial content
                         content_parts.append(clean_text)
+                        # The sentence cut below never looks past character 600
+                        if len(' '.join(content_parts)) > 600:
+                            break
                         
             if content_parts:
                 # Combine content and limit to reasonable length
@@ -43,17 +107,89 @@ def _extract_fallback_document_content(pdf_path: str, doc_name: str) -> str:
                         return full_content[:500] + "..."
                 else:
                     return full_content
+        finally:
+            pdf.close()
                     
     except Exception as e:
-        print(f"Error in fallback extraction for {doc_name}: {e}")
+        log.warning(f"Error in fallback extraction for {doc_name}: {e}")
         
     # Final fallback
     return f"Document summary content from {doc_name.replace('.pdf', '')} covering key topics and information relevant to travel planning."
 
+def _extract_one(doc_name: str, pdf_bytes: bytes) -> tuple[str, dict]:
+    """Parse the outline of a single document (runs in a worker process)"""
+    return doc_name, extract_outline(io.BytesIO(pdf_bytes))
+
+def _extract_selected_content(pdf_file: io.BytesIO, section: dict, outline: list[dict],
+                              start_index: int | None) -> str | None:
+    """Extract the refined text of one selected section, or None if nothing usable came out"""
+    doc_name = section['document']
+    try:
+        refined_text = extract_section_content(pdf_file, section, outline, start_index)
+    except Exception as e:
+        log.warning(f"Error extracting content from {doc_name}: {e}")
+        return None
+    
+    if not refined_text.strip():
+        log.warning(f"Warning: No content extracted for section '{section['text']}' from {doc_name}")
+        return None
+    return refined_text
+
+def _extract_document_content(pdf_bytes: bytes, sections: list[tuple[int, dict]], outline: list[dict],
+                              is_fallback: bool) -> list[tuple[int, str, bool]]:
+    """Extract all selected sections of one document (runs in a worker process)
+    
+    Sections are grouped per document so the PDF bytes are shipped to the
+    worker once and the fallback text is parsed once per PDF instead of once
+    per section. Documents without headings go straight to the fallback;
+    otherwise only the sections whose own extraction fails use it. Each text
+    comes with whether it was really extracted, as only those are cached.
+    """
+    pdf_file = io.BytesIO(pdf_bytes)
+    # Sections are the outline's own dicts (pickled together with it), so find
+    # them by identity instead of an equality scan per section
+    heading_index = {id(heading): i for i, heading in enumerate(outline)}
+    refined_texts = []
+    try:
+        for i, section in sections:
+            # Documents without real headings go straight to their first pages
+            refined_text = None if is_fallback else _extract_selected_content(
+                pdf_file, section, outline, heading_index.get(id(section)))
+            extracted = refined_text is not None
+            if not extracted:
+                refined_text = _extract_fallback_document_content(pdf_file, section['document'])
+            refined_texts.append((i, refined_text, extracted))
+        return refined_texts
+    finally:
+        _extract_fallback_document_content.cache_clear()
+        close_all_pdfs()
+
+def _write_output(metadata: dict, extracted_sections: list[dict], subsection_analysis: list[dict]):
+    """Stream the output JSON record by record through a 1 MiB write buffer
+    
+    With PRETTY_JSON set, the layout is identical to json.dump(..., indent=2)
+    of the whole document.
+    """
+    option = orjson.OPT_INDENT_2 if PRETTY_JSON else 0
+    # Line break plus indentation at nesting depth 1 and 2 (nothing when compact)
+    indent1, indent2 = (b'\n  ', b'\n    ') if PRETTY_JSON else (b'', b'')
+    colon = b': ' if PRETTY_JSON else b':'
+    with open(OUTPUT_JSON, 'wb', buffering=1 << 20) as f:
+        f.write(b'{' + indent1 + b'"metadata"' + colon)
+        f.write(orjson.dumps(metadata, option=option).replace(b'\n', indent1))
+        for key, records in ((b'extracted_sections', extracted_sections),
+                             (b'subsection_analysis', subsection_analysis)):
+            f.write(b',' + indent1 + b'"' + key + b'"' + colon + b'[')
+            for n, record in enumerate(records):
+                f.write((b',' if n else b'') + indent2)
+                f.write(orjson.dumps(record, option=option).replace(b'\n', indent2))
+            f.write((indent1 if records else b'') + b']')
+        f.write(indent1[:1] + b'}')
+
 def process_document_collection():
     start_time = time.perf_counter()
     if not INPUT_JSON.exists():
-        print(f"Error: Input file not found at {INPUT_JSON}", file=sys.stderr)
+        log.error(f"Error: Input file not found at {INPUT_JSON}")
         sys.exit(1)
     with open(INPUT_JSON, 'r') as f:
         job_details = json.load(f)
@@ -73,24 +209,49 @@ def process_document_collection():
             document_files.append(doc["filename"])
         else:
             document_files.append(str(doc))  # Fallback for old format
-    print(f"Starting processing for Persona: {persona}")
-    print(f"Task: {job_to_be_done}")
+    log.info(f"Starting processing for Persona: {persona}")
+    log.info(f"Task: {job_to_be_done}")
     all_sections = []
     document_outlines = {}
     documents_without_headings = []
     
+    # Read every PDF once; the workers parse from these in-memory buffers
+    pdf_bytes = {}
     for doc_name in document_files:
-        pdf_path = INPUT_DIR / doc_name
-        if not pdf_path.exists():
-            print(f"Warning: Document {doc_name} not found, skipping.", file=sys.stderr)
+        # Open directly instead of stat-ing first; a missing file costs one failed open
+        try:
+            pdf_bytes[doc_name] = (INPUT_DIR / doc_name).read_bytes()
+        except FileNotFoundError:
+            log.warning(f"Warning: Document {doc_name} not found, skipping.")
             continue
-        print(f"Extracting outline from {doc_name}...")
-        outline_data = extract_outline(str(pdf_path))
+        log.info(f"Extracting outline from {doc_name}...")
+    
+    # Outlines only depend on the PDF bytes, so reuse results from earlier runs
+    CACHE_DIR.mkdir(exist_ok=True)
+    pdf_hashes = {doc_name: hashlib.sha256(data).hexdigest() for doc_name, data in pdf_bytes.items()}
+    outlines_by_doc = {}
+    for doc_name, pdf_hash in pdf_hashes.items():
+        cached_outline = _load_cached(_outline_cache_path(pdf_hash))
+        if cached_outline is not None:
+            outlines_by_doc[doc_name] = cached_outline
+    
+    # Outlines are independent per document, so parse the rest in parallel
+    uncached_files = [doc_name for doc_name in pdf_bytes if doc_name not in outlines_by_doc]
+    if uncached_files:
+        _flush_logs()
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 4)) as pool:
+            for doc_name, outline_data in pool.map(_extract_one, uncached_files,
+                                                   [pdf_bytes[d] for d in uncached_files]):
+                _store_cached(_outline_cache_path(pdf_hashes[doc_name]), outline_data)
+                outlines_by_doc[doc_name] = outline_data
+    
+    for doc_name in pdf_bytes:
+        outline_data = outlines_by_doc[doc_name]
         headings_list = outline_data.get('outline', [])
         
         if not headings_list:
             # Create a fallback section for documents without headings
-            print(f"No headings found in {doc_name}, creating fallback section")
+            log.info(f"No headings found in {doc_name}, creating fallback section")
             fallback_section = {
                 'text': f"Overview of {doc_name.replace('.pdf', '')}",
                 'level': 'h1',
@@ -106,7 +267,8 @@ def process_document_collection():
                 
         all_sections.extend(headings_list)
         document_outlines[doc_name] = headings_list
-    ranker = SemanticRanker()
+    _flush_logs()  # the ranker reports its progress with print()
+    ranker = _get_ranker()
     ranked_sections = ranker.rank_sections(persona, job_to_be_done, all_sections)
     
     # Ensure we get representation from all documents with better diversity
@@ -116,6 +278,7 @@ def process_document_collection():
     
     # Strategy: GUARANTEE at least 1 section from each document, then fill remaining with top-ranked
     selected_sections = []
+    selected_ids = set()  # id() of every selected section, for O(1) membership checks
     document_count = {}
     used_documents = set()
     
@@ -123,24 +286,23 @@ def process_document_collection():
     documents_covered = set()
     remaining_sections = []
     
+    # Index the best (first-ranked) section of every document in a single scan
+    best_by_document = {}
+    for section in ranked_sections:
+        best_by_document.setdefault(section['document'], section)
+    
     # First pass: Ensure every document gets at least one section
     for doc_name in document_files:
         if doc_name not in documents_covered:
             # Find the best section from this document
-            best_section = None
-            best_rank = float('inf')
-            
-            for i, section in enumerate(ranked_sections):
-                if section['document'] == doc_name:
-                    best_section = section
-                    best_rank = i
-                    break
+            best_section = best_by_document.get(doc_name)
             
             if best_section:
                 selected_sections.append(best_section)
+                selected_ids.add(id(best_section))
                 documents_covered.add(doc_name)
                 document_count[doc_name] = 1
-                print(f"Guaranteed section from {doc_name}: '{best_section['text']}'")
+                log.info(f"Guaranteed section from {doc_name}: '{best_section['text']}'")
     
     # Second pass: Fill remaining slots with highest-ranked sections from any document
     max_per_doc = max(2, top_n // len(document_files))  # Allow max 2-3 per document
@@ -148,34 +310,47 @@ def process_document_collection():
         if len(selected_sections) >= top_n:
             break
         doc_name = section['document']
-        if section not in selected_sections and document_count.get(doc_name, 0) < max_per_doc:
+        if id(section) not in selected_ids and document_count.get(doc_name, 0) < max_per_doc:
             selected_sections.append(section)
+            selected_ids.add(id(section))
             document_count[doc_name] = document_count.get(doc_name, 0) + 1
     
-    print(f"Selected sections from {len(documents_covered)} documents: {sorted(documents_covered)}")
-    print(f"Document distribution: {dict(sorted(document_count.items()))}")
+    log.info(f"Selected sections from {len(documents_covered)} documents: {sorted(documents_covered)}")
+    log.info(f"Document distribution: {dict(sorted(document_count.items()))}")
     
+    # Each selected section re-reads its PDF, so run the extractions in parallel,
+    # one task per document, skipping sections already cached by an earlier run
+    refined_texts = {}
+    document_jobs = {}
     for i, section in enumerate(selected_sections, 1):
         doc_name = section['document']
-        pdf_path = str(INPUT_DIR / doc_name)
-        print(f"Extracting content for section {i}: '{section['text']}' from {doc_name}")
-        
-        try:
-            # Special handling for documents without real headings
-            if doc_name in documents_without_headings:
-                # For documents without headings, extract from the first page or multiple pages
-                refined_text = _extract_fallback_document_content(pdf_path, doc_name)
-            else:
-                refined_text = extract_section_content(pdf_path, section, document_outlines[doc_name])
-            
-            if not refined_text.strip():
-                print(f"Warning: No content extracted for section '{section['text']}' from {doc_name}")
-                # Use more aggressive fallback
-                refined_text = _extract_fallback_document_content(pdf_path, doc_name)
-                
-        except Exception as e:
-            print(f"Error extracting content from {doc_name}: {e}")
-            refined_text = _extract_fallback_document_content(pdf_path, doc_name)
+        cached_text = _load_cached(_section_cache_path(pdf_hashes[doc_name], section))
+        if cached_text is not None:
+            refined_texts[i] = cached_text
+            continue
+        log.info(f"Extracting content for section {i}: '{section['text']}' from {doc_name}")
+        document_jobs.setdefault(doc_name, []).append((i, section))
+    
+    if document_jobs:
+        _flush_logs()
+        with ProcessPoolExecutor(max_workers=min(len(document_jobs), os.cpu_count() or 4)) as pool:
+            futures = [
+                pool.submit(_extract_document_content, pdf_bytes[doc_name], sections,
+                            document_outlines[doc_name], doc_name in documents_without_headings)
+                for doc_name, sections in document_jobs.items()
+            ]
+            for future in futures:
+                for i, refined_text, extracted in future.result():
+                    # Fallback text (possibly a placeholder after an error) is
+                    # recomputed on every run rather than frozen into the cache
+                    if extracted:
+                        section = selected_sections[i - 1]
+                        _store_cached(_section_cache_path(pdf_hashes[section['document']], section), refined_text)
+                    refined_texts[i] = refined_text
+    
+    for i, section in enumerate(selected_sections, 1):
+        doc_name = section['document']
+        refined_text = refined_texts[i]
         
         # Basic section info without refined_text
         final_extracted_sections.append({
@@ -192,22 +367,18 @@ def process_document_collection():
             "page_number": section['page']
         })
     
-    output_data = {
-        "metadata": {
-            "input_documents": document_files,
-            "persona": persona,
-            "job_to_be_done": job_to_be_done,
-            "processing_timestamp": datetime.now(timezone.utc).isoformat()
-        },
-        "extracted_sections": final_extracted_sections,
-        "subsection_analysis": subsection_analysis
+    metadata = {
+        "input_documents": document_files,
+        "persona": persona,
+        "job_to_be_done": job_to_be_done,
+        "processing_timestamp": datetime.now(timezone.utc).isoformat()
     }
     OUTPUT_DIR.mkdir(exist_ok=True)
-    with open(OUTPUT_JSON, 'w') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    _write_output(metadata, final_extracted_sections, subsection_analysis)
     runtime = time.perf_counter() - start_time
-    print(f"\n[✓] Processing complete in {runtime:.2f}s")
-    print(f"Output saved to {OUTPUT_JSON}")
+    log.info(f"\n[✓] Processing complete in {runtime:.2f}s")
+    log.info(f"Output saved to {OUTPUT_JSON}")
 
 if __name__ == "__main__":
+    _configure_logging()
     process_document_collection()
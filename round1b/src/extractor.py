@@ -1,10 +1,13 @@
 
-import pdfplumber, pytesseract, math, re
+import pdfplumber, pytesseract, ahocorasick, math, re, io, os, tempfile, functools
+import numpy as np
 from PIL import Image
-from langdetect import detect
+from pdfplumber.page import test_proposed_bbox
 from pydantic import BaseModel
 from pathlib import Path
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 class OutlineItem(BaseModel):
     level: str
@@ -15,12 +18,149 @@ class DocumentOutline(BaseModel):
     title: str
     outline: list[OutlineItem]
 
+# ------------------------------------------------------------------
+# Precompiled patterns for the heading heuristics
+# ------------------------------------------------------------------
+_RE_WHITESPACE = re.compile(r'\s+')
+_RE_LEADING_DIGITS = re.compile(r'^\d+')
+_RE_DATE = re.compile(r'^\w+\s+\d{1,2},?\s+\d{4}')
+_RE_TIMELINE_FRAGMENT = re.compile(r'^\w+ \d{4}\s*-?\s*$')
+_RE_TIMELINE_YEAR = re.compile(r'^\d{4}[\s\-]')
+_RE_NUMBERED_MAIN = re.compile(r'^\d+\.\s+[A-Z][a-z]')
+_RE_NUMBERED_SUB = re.compile(r'^\d+\.\d+\s+[A-Z][a-z]')
+_RE_NUM_SEC = re.compile(r'^\d+\.\s+[A-Za-z]')
+_RE_NUM_SUBSEC = re.compile(r'^\d+\.\d+\s+[A-Za-z]')
+_RE_APPENDIX = re.compile(r'^appendix [a-z]:', re.IGNORECASE)
+_RE_PHASE = re.compile(r'^phase [ivx]+:', re.IGNORECASE)
+_RE_PAGE_NUMBER = re.compile(r'^page \d+')
+
+_WELL_FORMED_SECTION_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'^(Summary|Background|Introduction|Overview|Conclusion)$',
+    r'^Appendix [A-Z]:',
+    r'^Phase [IVX]+:',
+    r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*:$',  # Title case ending with colon
+    r'^\d+\.\s+[A-Z][a-z]+'  # Numbered sections
+])
+
+_MEANINGFUL_SECTION_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'^(Summary|Background|Introduction|Overview|Conclusion|Timeline|Milestones|Acknowledgements|References)$',
+    r'^Appendix [A-Z]:',
+    r'^Phase [IVX]+:',
+    r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*:$',
+    r'^\d+\.\s+[A-Z][a-z]+',
+    r'^(Chair|Term|Meetings|Membership|Preamble|Content|Audience|Duration|Outcomes|Trademarks)$'
+])
+
+# Common section headers scored by _analyze_text_patterns
+_SECTION_HEADERS = (
+    'summary', 'background', 'introduction', 'overview', 'approach',
+    'requirements', 'evaluation', 'timeline', 'milestones', 'methodology',
+    'conclusion', 'results', 'discussion'
+)
+_QUESTION_STARTS = ('What ', 'How ', 'Why ', 'For each ', 'For the ')
+_URL_PREFIXES = ('http://', 'https://', 'www.')
+
+# Character-class tests done with str.translate: each table deletes the
+# allowed ASCII symbols, digits and blanks, see _consists_of
+_FINANCIAL_CHARS = str.maketrans('', '', '0123456789$,.%-() \t')
+_NUMERIC_DATA_CHARS = str.maketrans('', '', '0123456789$,.%- \t')
+_NUMBERS_AND_SYMBOLS_CHARS = str.maketrans('', '', '0123456789-.() \t')
+
+def _consists_of(text, table):
+    """True if text is non-empty and only has table chars, digits and whitespace"""
+    # Whatever the table leaves can still be non-ASCII digits or whitespace,
+    # which the regex classes \d and \s also accepted
+    rest = ''.join(text.translate(table).split())
+    return bool(text) and (not rest or rest.isdecimal())
+
+# ------------------------------------------------------------------
+# Keyword prefilter: one Aho-Corasick scan reports every keyword class
+# a line contains, instead of one substring loop per keyword list
+# ------------------------------------------------------------------
+_KW_DOCUMENT_STRUCTURE = 1 << 0
+_KW_CAREER_LEARNING = 1 << 1
+_KW_BUSINESS_PATTERNS = 1 << 2
+_KW_SUBHEADING_TERMS = 1 << 3
+_KW_DOCUMENT_HEADERS = 1 << 4
+_KW_TECHNICAL_TERMS = 1 << 5
+_KW_FRAGMENT_INDICATORS = 1 << 6
+_KW_BUSINESS_TERMS = 1 << 7
+_KW_HEADING_INDICATORS = 1 << 8
+_KW_SECTION_HEADERS = 1 << 9
+
+_KEYWORD_CLASSES = {
+    _KW_DOCUMENT_STRUCTURE: [
+        'revision history', 'table of contents', 'acknowledgements', 
+        'references', 'introduction to the foundation',
+        'overview of the foundation'
+    ],
+    _KW_CAREER_LEARNING: ['intended audience', 'career paths', 'learning objectives', 'entry requirements', 'structure and course', 'keeping it current', 'business outcomes', 'content', 'trademarks', 'documents and web'],
+    _KW_BUSINESS_PATTERNS: [
+        'business plan', 'approach and specific', 'evaluation and awarding', 
+        'milestones', 'requirements', 'terms of reference'
+    ],
+    _KW_SUBHEADING_TERMS: ['funding', 'governance', 'decision-making', 'access', 'support', 'training'],
+    _KW_DOCUMENT_HEADERS: [
+        'revision history', 'table of contents', 'acknowledgements',
+        'references', 'trademarks', 'documents and web sites'
+    ],
+    _KW_TECHNICAL_TERMS: ['intended audience', 'career paths', 'learning objectives'],
+    _KW_FRAGMENT_INDICATORS: [
+        ' is to ', ' are to ', ' will be ', ' has been ', ' have been ',
+        ' can be ', ' should be ', ' must be ', ' to be ', ' that ',
+        ' which ', ' where ', ' when ', ' while ', ' during '
+    ],
+    _KW_BUSINESS_TERMS: [
+        'business plan', 'requirements', 'evaluation', 'approach', 
+        'implementation', 'methodology', 'milestones', 'funding',
+        'terms of reference', 'accountability', 'communication',
+        'intended audience', 'career paths', 'learning objectives',
+        'entry requirements', 'structure and course', 'keeping it current',
+        'business outcomes', 'documents and web sites'
+    ],
+    _KW_HEADING_INDICATORS: ['summary', 'background', 'appendix', 'phase', 'section'],
+    _KW_SECTION_HEADERS: _SECTION_HEADERS,
+}
+
+def _build_keyword_automaton():
+    automaton = ahocorasick.Automaton()
+    for keyword_class, keywords in _KEYWORD_CLASSES.items():
+        for keyword in keywords:
+            # A keyword shared by several lists carries all of their bits
+            automaton.add_word(keyword, automaton.get(keyword, 0) | keyword_class)
+    automaton.make_automaton()
+    return automaton
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+def _keyword_hits(text_lower):
+    """Bitmask of the keyword classes with at least one match in text_lower"""
+    hits = 0
+    for _, keyword_classes in _KEYWORD_AUTOMATON.iter(text_lower):
+        hits |= keyword_classes
+    return hits
+
+def _text_tokens(text):
+    """Lowercased text, its words and their count, tokenized once per candidate
+    
+    Stored on candidate dicts under these keys; the heading predicates read
+    them from the candidate instead of lowering and splitting text again.
+    """
+    text_lower = text.lower()
+    tokens = tuple(text_lower.split())
+    return {'_lower': text_lower, '_tokens': tokens, '_nwords': len(tokens)}
+
 # ------------------------------------------------------------------
 # Public API - Pure Heuristic Approach
 # ------------------------------------------------------------------
 def extract_outline(pdf_path: str) -> dict:
     return _enhanced_heuristic_outline(pdf_path).model_dump()
 
+# Scanned pages sent to Tesseract together; bounds the rendered images held at once
+OCR_BATCH_PAGES = 8
+# Batches OCRed in parallel: a quarter of the cores, one Tesseract thread each
+OCR_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+
 def _enhanced_heuristic_outline(pdf_path: str) -> DocumentOutline:
     """Enhanced heuristic approach with tree-structured heading organization"""
     
@@ -30,17 +170,21 @@ def _enhanced_heuristic_outline(pdf_path: str) -> DocumentOutline:
         
         # Extract all potential headings from all pages
         all_candidates = []
+        scanned_pages = []
         for page_num, page in enumerate(pdf.pages, start=1):
             if not page.chars:
-                # OCR for scanned pages
-                ocr_candidates = _ocr_page(page, page_num)
-                all_candidates.extend(ocr_candidates)
+                # Scanned pages are OCRed together after the text pages;
+                # the hierarchy sorts candidates by page anyway
+                scanned_pages.append(page_num)
                 continue
             
             # Extract heading candidates from page
             page_candidates = _extract_heading_candidates_from_page(page, page_num)
             all_candidates.extend(page_candidates)
         
+        if scanned_pages:
+            all_candidates.extend(_ocr_pages(pdf, pdf_path, scanned_pages))
+        
         # Build hierarchical structure and filter
         outline_items = _build_document_hierarchy(all_candidates)
     
@@ -73,7 +217,7 @@ def _extract_document_title_from_first_page(first_page):
                 if j < len(lines):
                     candidate_line = lines[j].strip()
                     if (len(candidate_line) > 5 and 
-                        not re.match(r'^\d+', candidate_line) and
+                        not _RE_LEADING_DIGITS.match(candidate_line) and
                         not candidate_line.lower().startswith(('march', 'april', 'january'))):
                         title_parts.append(candidate_line)
             
@@ -93,7 +237,7 @@ def _extract_document_title_from_first_page(first_page):
             if title_parts:
                 full_title = ' '.join(title_parts).strip()
                 # Clean up common artifacts
-                full_title = re.sub(r'\s+', ' ', full_title)  # Multiple spaces
+                full_title = _RE_WHITESPACE.sub(' ', full_title)  # Multiple spaces
                 if len(full_title) > 20:
                     title_candidates.append(full_title)
     
@@ -156,7 +300,7 @@ def _extract_document_title_from_first_page(first_page):
         best_candidate = max(title_candidates, key=len)
         
         # Clean up the title
-        best_candidate = re.sub(r'\s+', ' ', best_candidate).strip()
+        best_candidate = _RE_WHITESPACE.sub(' ', best_candidate).strip()
         
         # If it's very long, try to truncate sensibly
         if len(best_candidate) > 150:
@@ -171,7 +315,7 @@ def _extract_document_title_from_first_page(first_page):
     for line in lines[:8]:
         if (len(line) > 15 and 
             any(word in line.lower() for word in ['ontario', 'digital', 'library']) and
-            not re.match(r'^\d+', line)):
+            not _RE_LEADING_DIGITS.match(line)):
             return line
     
     return lines[0] if lines else "Untitled"
@@ -263,8 +407,7 @@ def _calculate_smart_thresholds(font_sizes, text_lines):
         size_usage[size]['total_chars'] += len(line['text'])
         
         # Count heading indicators
-        if any(pattern in line['text'].lower() for pattern in 
-               ['summary', 'background', 'appendix', 'phase', 'section']):
+        if _keyword_hits(line['text'].lower()) & _KW_HEADING_INDICATORS:
             size_usage[size]['heading_indicators'] += 1
     
     # Select sizes that are likely for headings
@@ -296,16 +439,18 @@ def _analyze_line_with_enhanced_scoring(line, thresholds, page_num):
     """Enhanced line analysis with better scoring"""
     text = line['text'].strip()
     
-    # Enhanced filtering for non-headings
-    if _is_definitely_not_heading(text):
+    # Skip very short or very long text, before any pattern work
+    if len(text) < 3 or len(text) > 200:
         return None
     
-    # Skip very short or very long text
-    if len(text) < 3 or len(text) > 200:
+    tokens = _text_tokens(text)
+    
+    # Enhanced filtering for non-headings
+    if _is_definitely_not_heading(text, tokens):
         return None
     
     # Skip obvious content fragments
-    if _is_content_fragment(text):
+    if _is_content_fragment(text, tokens):
         return None
     
     confidence = 0.0
@@ -327,7 +472,7 @@ def _analyze_line_with_enhanced_scoring(line, thresholds, page_num):
         level = 'H4'
     
     # Enhanced pattern analysis
-    pattern_boost, pattern_level = _enhanced_pattern_analysis(text)
+    pattern_boost, pattern_level = _enhanced_pattern_analysis(text, tokens)
     confidence += pattern_boost
     if pattern_level and pattern_boost > 0.3:
         level = pattern_level
@@ -361,12 +506,13 @@ def _analyze_line_with_enhanced_scoring(line, thresholds, page_num):
             'page': page_num,
             'confidence': min(confidence, 1.0),
             'font_size': size,
-            'position': line.get('y_pos', 0)
+            'position': line.get('y_pos', 0),
+            **tokens
         }
     
     return None
 
-def _is_content_fragment(text):
+def _is_content_fragment(text, tokens):
     """Check if text is a content fragment rather than a heading"""
     # Fragments that are clearly middle of sentences
     if text.startswith(('and ', 'or ', 'but ', 'the ', 'a ', 'an ', 'of ', 'in ', 'to ', 'for ')):
@@ -377,11 +523,11 @@ def _is_content_fragment(text):
         return True
     
     # Timeline fragments
-    if re.match(r'^\w+ \d{4}\s*-?\s*$', text) or 'timeline:' in text.lower():
+    if _RE_TIMELINE_FRAGMENT.match(text) or 'timeline:' in tokens['_lower']:
         return True
     
     # Very incomplete sentences
-    if len(text.split()) < 3 and not text.endswith(':') and not text.isupper():
+    if tokens['_nwords'] < 3 and not text.endswith(':') and not text.isupper():
         return True
     
     return False
@@ -393,16 +539,8 @@ def _is_well_formed_heading(text):
         return True
     
     # Proper section titles
-    section_patterns = [
-        r'^(Summary|Background|Introduction|Overview|Conclusion)$',
-        r'^Appendix [A-Z]:', 
-        r'^Phase [IVX]+:',
-        r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*:$',  # Title case ending with colon
-        r'^\d+\.\s+[A-Z][a-z]+'  # Numbered sections
-    ]
-    
-    for pattern in section_patterns:
-        if re.match(pattern, text, re.IGNORECASE):
+    for pattern in _WELL_FORMED_SECTION_PATTERNS:
+        if pattern.match(text):
             return True
     
     # "For each/For the" patterns that are complete
@@ -427,35 +565,31 @@ def _is_incomplete_heading(text):
     
     return False
 
-def _enhanced_pattern_analysis(text):
+def _enhanced_pattern_analysis(text, tokens):
     """Enhanced pattern analysis with better scoring"""
     boost = 0.0
     suggested_level = None
     
-    text_lower = text.lower().strip()
+    text_lower = tokens['_lower'].strip()
+    hits = _keyword_hits(text_lower)
     
     # Document structure patterns (H1 level)
-    document_structure = [
-        'revision history', 'table of contents', 'acknowledgements', 
-        'references', 'introduction to the foundation',
-        'overview of the foundation'
-    ]
-    if any(pattern in text_lower for pattern in document_structure):
+    if hits & _KW_DOCUMENT_STRUCTURE:
         return 0.9, 'H1'
     
     # Numbered main sections (H1 level)
-    if re.match(r'^\d+\.\s+[A-Z][a-z]', text):
+    if _RE_NUMBERED_MAIN.match(text):
         return 0.9, 'H1'
     
     # Numbered subsections (H2 level)  
-    if re.match(r'^\d+\.\d+\s+[A-Z][a-z]', text):
+    if _RE_NUMBERED_SUB.match(text):
         return 0.8, 'H2'
     
     # Strong heading patterns
-    if re.match(r'^appendix [a-z]:', text, re.IGNORECASE):
+    if _RE_APPENDIX.match(text):
         return 0.8, 'H2'  # Increased confidence
     
-    if re.match(r'^phase [ivx]+:', text, re.IGNORECASE):
+    if _RE_PHASE.match(text):
         return 0.7, 'H3'  # Increased confidence
     
     # Major section headers (enhanced)
@@ -464,8 +598,7 @@ def _enhanced_pattern_analysis(text):
         return 0.8, 'H2'  # Increased confidence
     
     # Career/Learning/Business related subsections
-    career_learning = ['intended audience', 'career paths', 'learning objectives', 'entry requirements', 'structure and course', 'keeping it current', 'business outcomes', 'content', 'trademarks', 'documents and web']
-    if any(pattern in text_lower for pattern in career_learning):
+    if hits & _KW_CAREER_LEARNING:
         return 0.8, 'H2'
     
     # Subsection patterns (enhanced)
@@ -476,11 +609,7 @@ def _enhanced_pattern_analysis(text):
         return 0.6, 'H3'
     
     # Business plan specific patterns
-    business_patterns = [
-        'business plan', 'approach and specific', 'evaluation and awarding', 
-        'milestones', 'requirements', 'terms of reference'
-    ]
-    if any(pattern in text_lower for pattern in business_patterns):
+    if hits & _KW_BUSINESS_PATTERNS:
         return 0.7, 'H2'  # Increased confidence
     
     # Single word important sections
@@ -491,7 +620,7 @@ def _enhanced_pattern_analysis(text):
     # Colon endings (subheadings)
     if text.endswith(':') and len(text) < 80 and len(text) > 3:
         # Check if it's a principle or service (H3) vs specific item (H4)
-        if any(word in text_lower for word in ['funding', 'governance', 'decision-making', 'access', 'support', 'training']):
+        if hits & _KW_SUBHEADING_TERMS:
             return 0.6, 'H3'
         return 0.5, 'H3'
     
@@ -533,7 +662,7 @@ def _build_document_hierarchy(candidates):
         confidence = candidate['confidence']
         
         # Skip duplicates
-        text_key = text.lower().strip()
+        text_key = candidate['_lower'].strip()
         if text_key in seen_texts:
             continue
         
@@ -577,7 +706,7 @@ def _node_quality_check(candidate, current_path, existing_headings):
         return False
     
     # Enhanced fragment detection
-    if _is_sentence_fragment(text):
+    if _is_sentence_fragment(text, candidate):
         return False
     
     # Check path consistency
@@ -585,7 +714,7 @@ def _node_quality_check(candidate, current_path, existing_headings):
         return False
     
     # Enhanced content validation
-    if not _is_meaningful_heading(text):
+    if not _is_meaningful_heading(text, candidate):
         return False
     
     # Context-aware duplicate checking
@@ -594,36 +723,28 @@ def _node_quality_check(candidate, current_path, existing_headings):
     
     return True
 
-def _is_sentence_fragment(text):
+def _is_sentence_fragment(text, tokens):
     """Detect sentence fragments that shouldn't be headings"""
     # Don't filter out important single word sections
     important_singles = ['summary', 'background', 'timeline', 'milestones', 'preamble', 'membership', 'chair', 'term', 'meetings', 'acknowledgements', 'references', 'content', 'trademarks']
-    if text.lower().strip() in important_singles:
+    if tokens['_lower'].strip() in important_singles:
         return False
     
     # Don't filter out document structure headers
-    document_headers = [
-        'revision history', 'table of contents', 'acknowledgements',
-        'references', 'trademarks', 'documents and web sites'
-    ]
-    if any(header in text.lower() for header in document_headers):
+    hits = _keyword_hits(tokens['_lower'])
+    if hits & _KW_DOCUMENT_HEADERS:
         return False
     
     # Don't filter out numbered sections
-    if re.match(r'^\d+\.\s+[A-Za-z]', text) or re.match(r'^\d+\.\d+\s+[A-Za-z]', text):
+    if _RE_NUM_SEC.match(text) or _RE_NUM_SUBSEC.match(text):
         return False
     
     # Starts with lowercase or mid-sentence words (but allow technical terms)
-    if text and text[0].islower() and not any(term in text.lower() for term in ['intended audience', 'career paths', 'learning objectives']):
+    if text and text[0].islower() and not hits & _KW_TECHNICAL_TERMS:
         return True
     
     # Contains obvious sentence continuations
-    fragment_indicators = [
-        ' is to ', ' are to ', ' will be ', ' has been ', ' have been ',
-        ' can be ', ' should be ', ' must be ', ' to be ', ' that ',
-        ' which ', ' where ', ' when ', ' while ', ' during '
-    ]
-    if any(indicator in text.lower() for indicator in fragment_indicators):
+    if hits & _KW_FRAGMENT_INDICATORS:
         return True
     
     # Ends with incomplete phrases (but not colon endings which are headers)
@@ -631,8 +752,7 @@ def _is_sentence_fragment(text):
         return True
     
     # Very incomplete sentences (less than 2 words and not a proper heading)
-    words = text.split()
-    if len(words) < 2 and not text.endswith(':') and not text.isupper() and text.lower() not in important_singles:
+    if tokens['_nwords'] < 2 and not text.endswith(':') and not text.isupper() and tokens['_lower'] not in important_singles:
         return True
     
     return False
@@ -643,39 +763,36 @@ def _breaks_hierarchy_path(candidate, current_path):
     level = candidate['level']
     
     # Skip timeline entries that break hierarchy
-    if re.match(r'^\d{4}[\s\-]', text) or 'timeline:' in text.lower():
+    if _RE_TIMELINE_YEAR.match(text) or 'timeline:' in candidate['_lower']:
         return True
     
     # Skip financial data that breaks hierarchy
-    if re.match(r'^[\d\$,.\s%\-\(\)]+$', text):
+    if _consists_of(text, _FINANCIAL_CHARS):
         return True
     
     # Skip obvious page headers/footers
-    if len(text) < 10 and (text.isdigit() or re.match(r'^page \d+', text.lower())):
+    if len(text) < 10 and (text.isdigit() or _RE_PAGE_NUMBER.match(candidate['_lower'])):
         return True
     
     return False
 
-def _is_meaningful_heading(text):
+def _is_meaningful_heading(text, tokens):
     """Check if text represents a meaningful heading"""
     # Must have substantial content
     if len(text.strip()) < 2:  # Further reduced
         return False
     
     # Should not be pure numbers or symbols
-    if re.match(r'^[\d\s\-\.\(\)]+$', text):
+    if _consists_of(text, _NUMBERS_AND_SYMBOLS_CHARS):
         return False
     
     # Should not be email addresses or URLs
-    if '@' in text or text.startswith(('http://', 'https://', 'www.')):
+    if '@' in text or text.startswith(_URL_PREFIXES):
         return False
     
     # Document structure headers (high priority)
-    document_headers = [
-        'revision history', 'table of contents', 'acknowledgements',
-        'references', 'trademarks', 'documents and web sites'
-    ]
-    if any(header in text.lower() for header in document_headers):
+    hits = _keyword_hits(tokens['_lower'])
+    if hits & _KW_DOCUMENT_HEADERS:
         return True
     
     # Prefer headings that end with colons or are complete phrases
@@ -687,29 +804,20 @@ def _is_meaningful_heading(text):
         return True
     
     # Accept numbered sections (enhanced)
-    if re.match(r'^\d+\.\s+[A-Za-z]', text):
+    if _RE_NUM_SEC.match(text):
         return True
     
     # Accept numbered subsections
-    if re.match(r'^\d+\.\d+\s+[A-Za-z]', text):
+    if _RE_NUM_SUBSEC.match(text):
         return True
     
     # Accept lettered appendices (enhanced)
-    if re.match(r'^Appendix [A-Z]:', text, re.IGNORECASE):
+    if _RE_APPENDIX.match(text):
         return True
     
     # Accept proper section titles (enhanced)
-    section_patterns = [
-        r'^(Summary|Background|Introduction|Overview|Conclusion|Timeline|Milestones|Acknowledgements|References)$',
-        r'^Appendix [A-Z]:',
-        r'^Phase [IVX]+:',
-        r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*:$',
-        r'^\d+\.\s+[A-Z][a-z]+',
-        r'^(Chair|Term|Meetings|Membership|Preamble|Content|Audience|Duration|Outcomes|Trademarks)$'
-    ]
-    
-    for pattern in section_patterns:
-        if re.match(pattern, text, re.IGNORECASE):
+    for pattern in _MEANINGFUL_SECTION_PATTERNS:
+        if pattern.match(text):
             return True
     
     # Accept "For each/For the" patterns (enhanced for H4)
@@ -717,15 +825,7 @@ def _is_meaningful_heading(text):
         return True
     
     # Accept business/technical terms (enhanced)
-    business_terms = [
-        'business plan', 'requirements', 'evaluation', 'approach', 
-        'implementation', 'methodology', 'milestones', 'funding',
-        'terms of reference', 'accountability', 'communication',
-        'intended audience', 'career paths', 'learning objectives',
-        'entry requirements', 'structure and course', 'keeping it current',
-        'business outcomes', 'documents and web sites'
-    ]
-    if any(term in text.lower() for term in business_terms) and len(text) < 120:
+    if hits & _KW_BUSINESS_TERMS and len(text) < 120:
         return True
     
     # Accept single important words that are clear headings (enhanced)
@@ -734,11 +834,11 @@ def _is_meaningful_heading(text):
         'membership', 'chair', 'term', 'meetings', 'acknowledgements',
         'references', 'content', 'trademarks'
     ]
-    if text.lower().strip() in important_single_words:
+    if tokens['_lower'].strip() in important_single_words:
         return True
     
     # Reject obvious sentence fragments
-    if any(text.lower().startswith(start) for start in 
+    if any(tokens['_lower'].startswith(start) for start in 
            ['the ', 'a ', 'an ', 'and ', 'or ', 'but ', 'to ', 'of ', 'in ', 'for ']):
         return False
     
@@ -760,15 +860,20 @@ def _is_contextual_duplicate(text, existing_headings):
     # Simple similarity check with recent headings
     recent_headings = existing_headings[-3:]  # Check last 3 headings
     
+    text_key = text.lower().strip()
+    words1, signature1 = _word_set(text)
     for heading in recent_headings:
         # Exact match
-        if text.lower().strip() == heading.text.lower().strip():
+        if text_key == heading.text.lower().strip():
             return True
         
-        # Very high overlap
-        words1 = set(text.lower().split())
-        words2 = set(heading.text.lower().split())
+        # No shared word, so no overlap to measure; only headings whose
+        # signatures intersect pay for the exact set comparison
+        words2, signature2 = _word_set(heading.text)
+        if not signature1 & signature2:
+            continue
         
+        # Very high overlap
         if words1 and words2:
             overlap = len(words1.intersection(words2))
             min_len = min(len(words1), len(words2))
@@ -813,18 +918,31 @@ def _passes_final_quality_check(candidate, existing_headings):
         return False
     
     # Skip financial/numeric data that slipped through
-    if re.match(r'^[\d\$,.\s%\-$]+$', text):
+    if _consists_of(text, _NUMERIC_DATA_CHARS):
         return False
     
     return True
 
+@functools.lru_cache(maxsize=1024)
+def _word_set(text):
+    """Lowercased word set of text, and a 64-bit signature with one bit set per word
+    
+    Disjoint signatures mean disjoint word sets. Cached, since accepted
+    headings are compared against every following candidate.
+    """
+    words = frozenset(text.lower().split())
+    signature = 0
+    for word in words:
+        signature |= 1 << (hash(word) & 63)
+    return words, signature
+
 def _texts_too_similar(text1, text2):
     """Check if two texts are too similar"""
     # Simple similarity check
-    words1 = set(text1.lower().split())
-    words2 = set(text2.lower().split())
+    words1, signature1 = _word_set(text1)
+    words2, signature2 = _word_set(text2)
     
-    if not words1 or not words2:
+    if not words1 or not words2 or not signature1 & signature2:
         return False
     
     overlap = len(words1.intersection(words2))
@@ -832,18 +950,18 @@ def _texts_too_similar(text1, text2):
     
     return overlap / min_len > 0.8
 
-def _is_definitely_not_heading(text):
+def _is_definitely_not_heading(text, tokens):
     """Enhanced check if text is definitely not a heading"""
     # Combine original checks with new ones
-    if _is_non_heading(text):
+    if _is_non_heading(text, tokens):
         return True
         
     # Additional checks for content fragments
-    if _is_content_fragment(text):
+    if _is_content_fragment(text, tokens):
         return True
         
     # Very short words or abbreviations
-    if len(text.split()) == 1 and len(text) < 4:
+    if tokens['_nwords'] == 1 and len(text) < 4:
         return True
         
     # Contains multiple sentences
@@ -852,45 +970,62 @@ def _is_definitely_not_heading(text):
         
     return False
 
+# Bold flag per font name; documents only use a handful of fonts
+_BOLD_CACHE: dict[str, bool] = {}
+
+def _is_bold_font(fontname: str) -> bool:
+    bold = _BOLD_CACHE.get(fontname)
+    if bold is None:
+        bold = _BOLD_CACHE[fontname] = 'bold' in fontname.lower()
+    return bold
+
 def _get_text_lines_with_fonts(page):
-    """Get text lines with font information"""
-    lines = []
+    """Get text lines with font information, top of the page first"""
+    chars = page.chars
+    if not chars:
+        return []
     
-    # Group characters by Y coordinate (lines)
-    y_groups = {}
-    for char in page.chars:
-        y = round(char.get('y0', 0))
-        if y not in y_groups:
-            y_groups[y] = []
-        y_groups[y].append(char)
-    
-    # Process each line
-    for y in sorted(y_groups.keys(), reverse=True):
-        chars = sorted(y_groups[y], key=lambda x: x.get('x0', 0))
-        
+    # Every character attribute used below, read from the char dicts in one pass
+    ys, x0s, sizes, texts, fonts = zip(*[
+        (round(char.get('y0', 0)), char.get('x0', 0), char.get('size', 12), char['text'],
+         char.get('fontname', '') or '')
+        for char in chars
+    ])
+    ys = np.array(ys, dtype=np.int64)
+    x0s = np.array(x0s, dtype=np.float64)
+    
+    # Group characters by Y coordinate (lines), left to right within a line;
+    # lexsort is stable, like the per-line sorted() it replaces
+    order = np.lexsort((x0s, -ys))
+    ys, x0s = ys[order], x0s[order]
+    starts = np.flatnonzero(np.r_[True, ys[1:] != ys[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    
+    order = order.tolist()
+    texts = [texts[i] for i in order]
+    sizes = [sizes[i] for i in order]
+    bold_chars = np.fromiter((_is_bold_font(fonts[i]) for i in order), dtype=bool, count=len(order))
+    
+    # Per-line aggregates in one call each
+    max_sizes = np.maximum.reduceat(np.asarray(sizes, dtype=np.float64), starts).tolist()
+    left_margins = np.minimum.reduceat(x0s, starts).tolist()
+    bold_lines = np.logical_or.reduceat(bold_chars, starts).tolist()
+    
+    lines = []
+    for i, (begin, end) in enumerate(zip(starts.tolist(), ends.tolist())):
         # Reconstruct text
-        text = ''.join(char['text'] for char in chars).strip()
+        text = ''.join(texts[begin:end]).strip()
         if not text:
             continue
         
-        # Calculate properties
-        sizes = [char.get('size', 12) for char in chars]
-        avg_size = sum(sizes) / len(sizes) if sizes else 12
-        max_size = max(sizes) if sizes else 12
-        
-        left_margin = min(char.get('x0', 0) for char in chars)
-        
-        # Check for bold
-        fonts = [char.get('fontname', '') for char in chars]
-        is_bold = any('bold' in font.lower() for font in fonts if font)
-        
         lines.append({
             'text': text,
-            'avg_size': avg_size,
-            'max_size': max_size,
-            'left_margin': left_margin,
-            'is_bold': is_bold,
-            'y_pos': y
+            # Summed in reading order, exactly as before; reduceat may sum pairwise
+            'avg_size': sum(sizes[begin:end]) / (end - begin),
+            'max_size': max_sizes[i],
+            'left_margin': left_margins[i],
+            'is_bold': bold_lines[i],
+            'y_pos': int(ys[begin])
         })
     
     return lines
@@ -898,6 +1033,12 @@ def _get_text_lines_with_fonts(page):
 def _calculate_heading_score(line, h1_thresh, h2_thresh, h3_thresh):
     """Calculate heading score for a text line"""
     text = line['text']
+    
+    # Obvious non-headings (dates, emails, URLs, sentences, numbers) score
+    # nothing, so skip the font and pattern analysis for them
+    if _is_non_heading(text, _text_tokens(text)):
+        return {'confidence': 0.0, 'level': 'H4'}
+    
     confidence = 0.0
     level = 'H4'
     
@@ -935,10 +1076,6 @@ def _calculate_heading_score(line, h1_thresh, h2_thresh, h3_thresh):
     if pattern_level and pattern_boost > 0.25:
         level = pattern_level
     
-    # Penalty for obvious non-headings
-    if _is_non_heading(text):
-        confidence -= 0.4
-    
     return {'confidence': min(confidence, 1.0), 'level': level}
 
 def _analyze_text_patterns(text):
@@ -949,30 +1086,25 @@ def _analyze_text_patterns(text):
     text_lower = text.lower().strip()
     
     # Appendix patterns
-    if re.match(r'^appendix [a-z]:', text, re.IGNORECASE):
+    if _RE_APPENDIX.match(text):
         return 0.6, 'H2'
     
     # Phase patterns  
-    if re.match(r'^phase [ivx]+:', text, re.IGNORECASE):
+    if _RE_PHASE.match(text):
         return 0.5, 'H3'
     
     # Numbered sections
-    if re.match(r'^\d+\.\s+[A-Za-z]', text):
+    if _RE_NUM_SEC.match(text):
         return 0.5, 'H3'
-    if re.match(r'^\d+\.\d+\s+[A-Za-z]', text):
+    if _RE_NUM_SUBSEC.match(text):
         return 0.4, 'H4'
     
     # Common section headers
-    section_headers = [
-        'summary', 'background', 'introduction', 'overview', 'approach',
-        'requirements', 'evaluation', 'timeline', 'milestones', 'methodology',
-        'conclusion', 'results', 'discussion'
-    ]
-    if any(header in text_lower for header in section_headers) and len(text) < 50:
+    if len(text) < 50 and _keyword_hits(text_lower) & _KW_SECTION_HEADERS:
         return 0.4, 'H2'
     
     # Question patterns for subsections
-    if text.startswith(('What ', 'How ', 'Why ', 'For each ', 'For the ')):
+    if text.startswith(_QUESTION_STARTS):
         return 0.3, 'H3'
     
     # Colon endings (subheadings)
@@ -993,10 +1125,11 @@ def _analyze_text_patterns(text):
     
     return boost, suggested_level
 
-def _is_non_heading(text):
+def _is_non_heading(text, tokens):
     """Check if text is definitely not a heading"""
-    # Dates
-    if re.match(r'^\w+\s+\d{1,2},?\s+\d{4}', text):
+    # Dates: the regex can only match when the second word starts with a digit
+    words = tokens['_tokens']
+    if len(words) > 1 and words[1][:1].isdecimal() and _RE_DATE.match(text):
         return True
     
     # Email addresses  
@@ -1004,7 +1137,7 @@ def _is_non_heading(text):
         return True
     
     # URLs
-    if text.startswith(('http://', 'https://', 'www.')):
+    if text.startswith(_URL_PREFIXES):
         return True
     
     # Complete sentences (end with period, not colon)
@@ -1012,11 +1145,11 @@ def _is_non_heading(text):
         return True
     
     # Pure numbers/data
-    if re.match(r'^[\d\$,.\s%\-]+$', text):
+    if _consists_of(text, _NUMERIC_DATA_CHARS):
         return True
     
     # Very fragmented text
-    if len(text.split()) == 1 and len(text) < 8:
+    if tokens['_nwords'] == 1 and len(text) < 8:
         return True
     
     return False
@@ -1024,12 +1157,52 @@ def _is_non_heading(text):
 # ------------------------------------------------------------------
 # OCR helper for scanned pages  
 # ------------------------------------------------------------------
-def _ocr_page(page, page_num):
-    """Enhanced OCR processing for scanned pages"""
-    img = page.to_image(resolution=150).original
-    
-    # Detect language for better OCR
+def _ocr_pages(pdf, pdf_path, page_nums):
+    """OCR scanned pages in batches, spread over worker processes when there are several"""
+    # Language rarely changes within a document, so sample the first scanned page only
+    first_image = pdf.pages[page_nums[0] - 1].to_image(resolution=150).original
+    tesseract_lang = _detect_tesseract_lang(first_image)
+    
+    batches = [page_nums[start:start + OCR_BATCH_PAGES]
+               for start in range(0, len(page_nums), OCR_BATCH_PAGES)]
+    if OCR_WORKERS > 1 and len(batches) > 1:
+        # Page objects don't pickle, so each worker opens its own copy of the document
+        if hasattr(pdf_path, 'getvalue'):
+            source = pdf_path.getvalue()
+        elif hasattr(pdf_path, 'read'):
+            pdf_path.seek(0)
+            source = pdf_path.read()
+        else:
+            source = str(pdf_path)
+        with ProcessPoolExecutor(max_workers=min(OCR_WORKERS, len(batches)),
+                                 initializer=_init_ocr_worker, initargs=(source,)) as executor:
+            results = list(executor.map(_ocr_batch_in_worker, batches, repeat(tesseract_lang)))
+    else:
+        results = [_ocr_batch(pdf, batch, tesseract_lang) for batch in batches]
+    return [candidate for batch_candidates in results for candidate in batch_candidates]
+
+_worker_pdf = None
+
+def _init_ocr_worker(source):
+    global _worker_pdf
+    # Tesseract's OpenMP threads would only compete with the other workers
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    _worker_pdf = pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+def _ocr_batch_in_worker(page_nums, tesseract_lang):
+    return _ocr_batch(_worker_pdf, page_nums, tesseract_lang)
+
+def _ocr_batch(pdf, page_nums, tesseract_lang):
+    """OCR one batch of scanned pages in a single Tesseract run"""
+    images = [pdf.pages[page_num - 1].to_image(resolution=150).original for page_num in page_nums]
+    return _ocr_images(images, page_nums, tesseract_lang)
+
+def _detect_tesseract_lang(img):
+    """Detect language for better OCR"""
     try:
+        # langdetect loads its language profiles on import; only pay for
+        # that when a document actually needs OCR
+        from langdetect import detect
         sample_text = pytesseract.image_to_string(img)[:200]
         lang = detect(sample_text) if sample_text.strip() else "eng"
         
@@ -1042,27 +1215,43 @@ def _ocr_page(page, page_num):
             'de': 'deu',   # German
             'en': 'eng'    # English
         }
-        tesseract_lang = lang_map.get(lang, 'eng')
+        return lang_map.get(lang, 'eng')
     except:
-        tesseract_lang = 'eng'
-    
-    # Get detailed OCR data
-    data = pytesseract.image_to_data(
-        img, lang=tesseract_lang, output_type=pytesseract.Output.DICT
-    )
+        return 'eng'
+
+def _ocr_images(images, page_nums, tesseract_lang):
+    """Enhanced OCR processing for scanned pages, in a single Tesseract run"""
+    # Tesseract reads a text file listing image paths as one multi-page input,
+    # so its language data is loaded once for the whole batch
+    with tempfile.TemporaryDirectory(prefix='ocr_') as tmp_dir:
+        paths = []
+        for i, img in enumerate(images):
+            path = os.path.join(tmp_dir, f"page_{i}.png")
+            img.save(path)
+            paths.append(path)
+        list_path = os.path.join(tmp_dir, "list.txt")
+        with open(list_path, 'w') as f:
+            f.write('\n'.join(paths) + '\n')
+        
+        # Get detailed OCR data
+        data = pytesseract.image_to_data(
+            list_path, lang=tesseract_lang, output_type=pytesseract.Output.DICT
+        )
     
     candidates = []
-    for i, height in enumerate(data["height"]):
-        confidence = int(data["conf"][i])
+    for i, image_num in enumerate(data["page_num"]):
+        confidence = int(float(data["conf"][i]))
         text = data["text"][i]
         
         if confidence > 30 and text.strip():
             candidates.append({
                 'text': text.strip(),
                 'level': 'H3',  # Default level for OCR
-                'page': page_num,
+                # The TSV page_num column counts images in list order
+                'page': page_nums[int(image_num) - 1],
                 'confidence': min(0.8, confidence / 100.0),
-                'source': 'ocr'
+                'source': 'ocr',
+                **_text_tokens(text.strip())
             })
     
     return candidates
@@ -1070,86 +1259,119 @@ def _ocr_page(page, page_num):
 # ------------------------------------------------------------------
 # NEW FUNCTION FOR ROUND 1B
 # ------------------------------------------------------------------
-def extract_section_content(pdf_path: str, start_heading: dict, all_headings: list[dict]) -> str:
-    content = []
-    
-    # Find the starting heading in the list
-    try:
-        start_index = all_headings.index(start_heading)
-    except ValueError:
-        # If heading not found, extract from the page using fallback method
-        return _fallback_extract_content(pdf_path, start_heading)
+# Open PDFs by source, so the sections of one document share a single parse,
+# and full-page texts by (source, page index), so each page is laid out once
+_OPEN_PDFS = {}
+_PAGE_TEXTS = {}
+# Pages the last-resort fallback scans for any usable text
+FALLBACK_SCAN_PAGES = 10
+
+def _open_pdf_cached(pdf_path):
+    """Open pdf_path once and return the same pdfplumber.PDF until close_all_pdfs()"""
+    pdf = _OPEN_PDFS.get(pdf_path)
+    if pdf is None:
+        pdf = _OPEN_PDFS[pdf_path] = pdfplumber.open(pdf_path)
+    return pdf
+
+def _page_text(pdf_path, pdf, i):
+    """extract_text() of the whole page i, computed once per open PDF"""
+    key = (pdf_path, i)
+    text = _PAGE_TEXTS.get(key)
+    if text is None:
+        text = _PAGE_TEXTS[key] = pdf.pages[i].extract_text()
+    return text
+
+def close_all_pdfs():
+    """Close every PDF opened for section content extraction"""
+    _PAGE_TEXTS.clear()
+    while _OPEN_PDFS:
+        _OPEN_PDFS.popitem()[1].close()
+
+def extract_section_content(pdf_path: str, start_heading: dict, all_headings: list[dict],
+                            start_index: int | None = None) -> str:
+    # Find the starting heading in the list, unless the caller knows its position
+    if start_index is None:
+        try:
+            start_index = all_headings.index(start_heading)
+        except ValueError:
+            # If heading not found, extract from the page using fallback method
+            return _fallback_extract_content(pdf_path, start_heading)
     
     # Find the next heading as the end boundary
     end_heading = None
     if start_index + 1 < len(all_headings):
         end_heading = all_headings[start_index + 1]
     
+    return _extract_section_between(pdf_path, start_heading, end_heading)
+
+def _extract_section_between(pdf_path, start_heading: dict, end_heading: dict | None) -> str:
+    """Text from start_heading up to end_heading, or to the end of the document"""
+    content = []
+    
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            start_page_num = start_heading['page']
-            start_y = start_heading.get('position', 0)
+        pdf = _open_pdf_cached(pdf_path)
+        start_page_num = start_heading['page']
+        start_y = start_heading.get('position', 0)
+        
+        # If we have an end heading, use it; otherwise extract to end of document
+        if end_heading:
+            end_page_num = end_heading['page']
+            end_y = end_heading.get('position', pdf.pages[end_page_num - 1].height)
+        else:
+            end_page_num = len(pdf.pages)
+            end_y = -1
+        
+        # Extract content from pages
+        for i in range(start_page_num - 1, min(end_page_num, len(pdf.pages))):
+            if i >= len(pdf.pages):
+                break
+                
+            page = pdf.pages[i]
             
-            # If we have an end heading, use it; otherwise extract to end of document
-            if end_heading:
-                end_page_num = end_heading['page']
-                end_y = end_heading.get('position', pdf.pages[end_page_num - 1].height)
+            # Determine boundaries for this page
+            if i == start_page_num - 1:
+                # First page - start from heading position
+                top_boundary = max(0, start_y)
             else:
-                end_page_num = len(pdf.pages)
-                end_y = -1
+                # Middle pages - start from top
+                top_boundary = 0
             
-            # Extract content from pages
-            for i in range(start_page_num - 1, min(end_page_num, len(pdf.pages))):
-                if i >= len(pdf.pages):
-                    break
-                    
-                page = pdf.pages[i]
-                
-                # Determine boundaries for this page
-                if i == start_page_num - 1:
-                    # First page - start from heading position
-                    top_boundary = max(0, start_y)
-                else:
-                    # Middle pages - start from top
-                    top_boundary = 0
-                
-                if end_heading and i == end_page_num - 1:
-                    # Last page - end at next heading position
-                    bottom_boundary = min(page.height, end_y)
+            if end_heading and i == end_page_num - 1:
+                # Last page - end at next heading position
+                bottom_boundary = min(page.height, end_y)
+            else:
+                # Full page extraction
+                bottom_boundary = page.height
+            
+            # Ensure valid boundaries
+            if bottom_boundary <= top_boundary:
+                # If boundaries are invalid, try fallback extraction
+                text = _fallback_extract_content(pdf_path, start_heading)
+                if text:
+                    return text
+                continue
+            
+            # Extract text from the defined area
+            try:
+                if top_boundary > 0 or bottom_boundary < page.height:
+                    # Only the part of the page between the boundaries
+                    text = _extract_band_text(page, top_boundary, bottom_boundary)
                 else:
-                    # Full page extraction
-                    bottom_boundary = page.height
-                
-                # Ensure valid boundaries
-                if bottom_boundary <= top_boundary:
-                    # If boundaries are invalid, try fallback extraction
-                    text = _fallback_extract_content(pdf_path, start_heading)
-                    if text:
-                        return text
-                    continue
+                    # Extract full page
+                    text = _page_text(pdf_path, pdf, i)
                 
-                # Extract text from the defined area
-                try:
-                    if top_boundary > 0 or bottom_boundary < page.height:
-                        # Crop the page if needed
-                        cropped_page = page.crop((0, top_boundary, page.width, bottom_boundary))
-                        text = cropped_page.extract_text()
-                    else:
-                        # Extract full page
-                        text = page.extract_text()
+                if text and text.strip():
+                    content.append(text.strip())
                     
+            except Exception as e:
+                # If cropping fails, try full page extraction
+                try:
+                    text = _page_text(pdf_path, pdf, i)
                     if text and text.strip():
                         content.append(text.strip())
-                        
-                except Exception as e:
-                    # If cropping fails, try full page extraction
-                    try:
-                        text = page.extract_text()
-                        if text and text.strip():
-                            content.append(text.strip())
-                    except:
-                        continue
-    
+                except:
+                    continue
+
     except Exception as e:
         # If all else fails, use fallback method
         return _fallback_extract_content(pdf_path, start_heading)
@@ -1157,58 +1379,88 @@ def extract_section_content(pdf_path: str, start_heading: dict, all_headings: li
     # Join and clean the extracted content
     if content:
         full_text = " ".join(content)
-        cleaned_text = re.sub(r'\s+', ' ', full_text).strip()
+        cleaned_text = _RE_WHITESPACE.sub(' ', full_text).strip()
         return cleaned_text
     else:
         # No content extracted, try fallback
         return _fallback_extract_content(pdf_path, start_heading)
 
 
+def _extract_band_text(page, top, bottom):
+    """Text of the full-width band between top and bottom
+    
+    Same as page.crop((0, top, page.width, bottom)).extract_text(), but only
+    the characters are clipped to the band; a cropped page would clip every
+    line, rect, curve and image of the page as well.
+    """
+    bbox = (0, top, page.width, bottom)
+    # crop() rejects bands outside the page, which sends callers to their fallback
+    test_proposed_bbox(bbox, page.bbox)
+    chars = pdfplumber.utils.crop_to_bbox(page.chars, bbox)
+    return pdfplumber.utils.chars_to_textmap(
+        chars, layout_bbox=bbox, layout_width=page.width, layout_height=bottom - top
+    ).as_string
+
+def _leading_sentences(text: str, count: int, min_breaks: int):
+    """First count '. '-separated sentences of text, joined and closed with a period
+    
+    Returns None when text has fewer than min_breaks sentence breaks. Only
+    the breaks needed are searched for, instead of splitting the whole text.
+    """
+    breaks = []
+    idx = 0
+    while len(breaks) < count:
+        j = text.find('. ', idx)
+        if j < 0:
+            break
+        breaks.append(j)
+        idx = j + 2
+    if len(breaks) < min_breaks:
+        return None
+    return (text[:breaks[-1]] if len(breaks) == count else text) + '.'
+
 def _fallback_extract_content(pdf_path: str, heading: dict) -> str:
     """Fallback method to extract content when main extraction fails"""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            page_num = heading.get('page', 1)
-            if page_num <= len(pdf.pages):
-                page = pdf.pages[page_num - 1]
-                
-                # Try to extract a reasonable chunk of text from the page
-                full_text = page.extract_text()
-                if full_text and full_text.strip():
-                    # Split into sentences and take first few paragraphs
-                    sentences = full_text.split('. ')
-                    if len(sentences) > 3:
-                        return '. '.join(sentences[:5]) + '.'
+        pdf = _open_pdf_cached(pdf_path)
+        page_num = heading.get('page', 1)
+        if page_num <= len(pdf.pages):
+            # Try to extract a reasonable chunk of text from the page
+            full_text = _page_text(pdf_path, pdf, page_num - 1)
+            if full_text and full_text.strip():
+                # Take the first few sentences if there are more than 3
+                leading = _leading_sentences(full_text, 5, 3)
+                if leading is not None:
+                    return leading
+                else:
+                    return full_text.strip()
+        
+        # If specific page fails, try extracting from nearby pages
+        for i in range(max(0, page_num - 2), min(len(pdf.pages), page_num + 2)):
+            try:
+                text = _page_text(pdf_path, pdf, i)
+                if text and len(text.strip()) > 50:  # Ensure we have substantial content
+                    leading = _leading_sentences(text, 3, 2)
+                    if leading is not None:
+                        return leading
                     else:
-                        return full_text.strip()
-            
-            # If specific page fails, try extracting from nearby pages
-            for i in range(max(0, page_num - 2), min(len(pdf.pages), page_num + 2)):
-                try:
-                    page = pdf.pages[i]
-                    text = page.extract_text()
-                    if text and len(text.strip()) > 50:  # Ensure we have substantial content
-                        sentences = text.split('. ')
-                        if len(sentences) > 2:
-                            return '. '.join(sentences[:3]) + '.'
-                        else:
-                            return text.strip()[:500]  # Limit to reasonable length
-                except:
-                    continue
-            
-            # Last resort: extract from any page with content
-            for i, page in enumerate(pdf.pages):
-                try:
-                    text = page.extract_text()
-                    if text and len(text.strip()) > 20:
-                        clean_text = ' '.join(text.split())
-                        if len(clean_text) > 100:
-                            return clean_text[:300] + "..."
-                        else:
-                            return clean_text
-                except:
-                    continue
-                    
+                        return text.strip()[:500]  # Limit to reasonable length
+            except:
+                continue
+        
+        # Last resort: extract from any of the first pages with content
+        for i in range(min(len(pdf.pages), FALLBACK_SCAN_PAGES)):
+            try:
+                text = _page_text(pdf_path, pdf, i)
+                if text and len(text.strip()) > 20:
+                    clean_text = ' '.join(text.split())
+                    if len(clean_text) > 100:
+                        return clean_text[:300] + "..."
+                    else:
+                        return clean_text
+            except:
+                continue
+                
     except Exception as e:
         pass
     
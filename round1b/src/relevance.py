@@ -1,28 +1,140 @@
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+from pathlib import Path
+import hashlib, json, os
+import numpy as np
 import torch
 
+# Texts per model forward pass when encoding headings
+ENCODE_BATCH_SIZE = 64
+# Load the weights in bfloat16; only pays off on CPUs with native bf16 matmul
+# (AVX512-BF16/AMX), and the shifted scores can change the selected sections
+BF16_INFERENCE = False
+
+class EmbeddingCache:
+    """Append-only on-disk store of text embeddings keyed by sha1(text)
+
+    Rows live in a raw float32 file that is memory-mapped on load, and a
+    sidecar JSON index maps each text hash to its row.
+    """
+    def __init__(self, cache_dir: str, model_name: str):
+        self.data_path = Path(cache_dir) / "embeddings.f32"
+        self.index_path = Path(cache_dir) / "embeddings.index.json"
+        self.model_name = model_name
+        self.dim = 0
+        self.rows = {}
+        self.matrix = None
+        try:
+            index = json.loads(self.index_path.read_text())
+            if index.get('model') == model_name and index.get('rows'):
+                self.dim = index['dim']
+                self.rows = index['rows']
+                self.matrix = np.memmap(self.data_path, dtype=np.float32, mode='r',
+                                        shape=(len(self.rows), self.dim))
+        except (OSError, ValueError, KeyError):
+            # Missing or inconsistent cache files: start from an empty cache
+            self.dim, self.rows, self.matrix = 0, {}, None
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get(self, text: str):
+        row = self.rows.get(self.key(text))
+        return None if row is None else np.array(self.matrix[row])
+
+    def add(self, texts: list[str], embeddings: np.ndarray):
+        new_rows = {}
+        for text, embedding in zip(texts, embeddings):
+            key = self.key(text)
+            if key not in self.rows:
+                new_rows[key] = embedding
+        if not new_rows:
+            return
+        block = np.asarray(list(new_rows.values()), dtype=np.float32)
+        self.dim = block.shape[1]
+        start = len(self.rows)
+        # Overwrite anything past the last indexed row left by an interrupted write
+        with open(self.data_path, 'r+b' if self.data_path.exists() else 'wb') as f:
+            f.seek(start * self.dim * block.itemsize)
+            f.write(block.tobytes())
+            f.truncate()
+        for offset, key in enumerate(new_rows):
+            self.rows[key] = start + offset
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({'model': self.model_name, 'dim': self.dim, 'rows': self.rows}))
+        os.replace(tmp_path, self.index_path)
+        self.matrix = np.memmap(self.data_path, dtype=np.float32, mode='r',
+                                shape=(len(self.rows), self.dim))
+
 class SemanticRanker:
-    def __init__(self, model_path: str = '/app/models/all-MiniLM-L6-v2'):
+    def __init__(self, model_path: str = '/app/models/all-MiniLM-L6-v2', cache_dir: str | None = None):
         self.device = "cpu"
+        # Reduced-precision embeddings differ slightly, so they get their own cache entries
+        model_name = Path(model_path).name + ("-bf16" if BF16_INFERENCE else "")
+        self.cache = EmbeddingCache(cache_dir, model_name) if cache_dir else None
         print(f"Loading model from {model_path} onto {self.device}...")
         try:
-            self.model = SentenceTransformer(model_path, device=self.device)
+            model_kwargs = {'torch_dtype': torch.bfloat16} if BF16_INFERENCE else None
+            self.model = SentenceTransformer(model_path, device=self.device, model_kwargs=model_kwargs)
             print("Model loaded successfully.")
         except Exception as e:
             print(f"Error loading model: {e}")
             self.model = None
 
-    def rank_sections(self, persona: str, job: str, sections: list[dict]) -> list[dict]:
+    def _run_model(self, texts: list[str]) -> np.ndarray:
+        """Embed texts with the model as float32 rows"""
+        # No autograd bookkeeping, whatever the sentence-transformers version
+        with torch.inference_mode():
+            embeddings = self.model.encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_tensor=True,
+                                           device=self.device)
+        # NumPy has no bfloat16
+        return embeddings.float().numpy()
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        """Encode texts, only running the model on those missing from the cache"""
+        if self.cache is None:
+            return self._run_model(texts)
+        embeddings = [self.cache.get(text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        print(f"Embedding cache hits: {len(texts) - len(missing)}/{len(texts)}")
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            fresh = self._run_model(missing_texts)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+            self.cache.add(missing_texts, fresh)
+        return np.stack(embeddings)
+
+    def rank_sections(self, persona: str, job: str, sections: list[dict], top_k: int | None = None) -> list[dict]:
+        """Return sections by decreasing relevance, only the best top_k if given
+        
+        Sections with equal scores keep their input order.
+        """
         if not self.model or not sections:
             return []
         query = f"User profile: {persona}. Task to be completed: {job}"
-        section_headings = [section['text'] for section in sections]
-        print(f"Encoding {len(section_headings)} section headings for relevance ranking...")
-        query_embedding = self.model.encode(query, convert_to_tensor=True, device=self.device)
-        section_embeddings = self.model.encode(section_headings, convert_to_tensor=True, device=self.device)
-        cosine_scores = util.cos_sim(query_embedding, section_embeddings)
-        for i, section in enumerate(sections):
-            section['relevance_score'] = cosine_scores[0][i].item()
-        ranked_sections = sorted(sections, key=lambda x: x['relevance_score'], reverse=True)
+        # Headings like "Introduction" repeat across documents; embed each distinct text once
+        unique_headings = list(dict.fromkeys(section['text'] for section in sections))
+        heading_index = {text: i for i, text in enumerate(unique_headings)}
+        print(f"Encoding {len(unique_headings)} unique section headings "
+              f"({len(sections)} sections) for relevance ranking...")
+        query_embedding = self._encode([query])[0]
+        section_embeddings = self._encode(unique_headings)
+        # Cosine similarity as one matrix-vector product of unit vectors
+        query_embedding = query_embedding / np.linalg.norm(query_embedding)
+        section_embeddings = section_embeddings / np.linalg.norm(section_embeddings, axis=1, keepdims=True)
+        cosine_scores = section_embeddings @ query_embedding
+        scores = cosine_scores[[heading_index[section['text']] for section in sections]]
+        for section, score in zip(sections, scores.tolist()):
+            section['relevance_score'] = score
+        if top_k is None or top_k >= len(sections):
+            order = np.argsort(-scores, kind='stable')
+        else:
+            # Everything scoring at least the k-th best score, then a stable sort of
+            # just those, so ties at the cut are resolved by input order as well
+            kth_score = -np.partition(-scores, top_k - 1)[top_k - 1]
+            candidates = np.flatnonzero(scores >= kth_score)
+            order = candidates[np.argsort(-scores[candidates], kind='stable')][:top_k]
+        ranked_sections = [sections[i] for i in order.tolist()]
         print("Ranking complete.")
         return ranked_sections